@@ -1,48 +1,115 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional
+import asyncio
 import hashlib
+import hmac
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cachetools import TLRUCache
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
+import jwt
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
 from config import settings
 
 # JWT Bearer
 security = HTTPBearer()
 
+# HMAC key encoded once instead of on every sign/verify
+_SIGNING_KEY = settings.secret_key.encode()
+
+# Validated JWT payloads keyed by a 16-byte BLAKE2b digest of the token (the bearer token
+# itself is never kept in memory); each entry expires at the token's own `exp`
+_token_cache = TLRUCache(maxsize=10_000, ttu=lambda _key, payload, _now: payload["exp"], timer=time.time)
+
+# Argon2id password hasher (salted, cost tuned via settings)
+password_hasher = PasswordHasher(
+    time_cost=settings.argon2_time_cost,
+    memory_cost=settings.argon2_memory_cost,
+    parallelism=settings.argon2_parallelism,
+)
+
 def verify_password(plain_password: str, stored_password: str) -> bool:
-    # Simple hash comparison for demo
-    return hashlib.sha256(plain_password.encode()).hexdigest() == stored_password
+    if not stored_password:
+        return False
+    # Legacy users were stored as an unsalted SHA-256 hex digest
+    if not stored_password.startswith("$argon2"):
+        return len(stored_password) == 64 and hmac.compare_digest(
+            hashlib.sha256(plain_password.encode()).hexdigest(), stored_password
+        )
+    try:
+        return password_hasher.verify(stored_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+def password_needs_rehash(stored_password: str) -> bool:
+    # Legacy SHA-256 digests, and argon2 hashes made with older cost settings
+    if not stored_password.startswith("$argon2"):
+        return True
+    try:
+        return password_hasher.check_needs_rehash(stored_password)
+    except InvalidHashError:
+        return True
 
 def get_password_hash(password: str) -> str:
-    # Simple hash for demo
-    return hashlib.sha256(password.encode()).hexdigest()
+    return password_hasher.hash(password)
+
+# Verified against when the email is unknown, so a miss costs the same as a wrong password
+DUMMY_PASSWORD_HASH = get_password_hash("dummy-password")
+
+# argon2-cffi releases the GIL while hashing, so threads run hashes in parallel without the
+# pickling/IPC cost of a process pool. A dedicated pool sized to the CPU count keeps login
+# bursts from queueing behind (or starving) the default executor used for Cloudinary calls.
+_password_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="password-hash")
+
+async def verify_password_async(plain_password: str, stored_password: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(_password_executor, verify_password, plain_password, stored_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_password_executor, get_password_hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
+        expire = datetime.now(timezone.utc) + timedelta(minutes=settings.access_token_expire_minutes)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+    encoded_jwt = jwt.encode(to_encode, _SIGNING_KEY, algorithm=settings.algorithm)
     return encoded_jwt
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    credentials_exception = HTTPException(
+def decode_access_token(token: str) -> dict:
+    # Signature verification runs once per token; later requests reuse the cached payload.
+    # No await happens here, so the cache is safe to share across coroutines without a lock.
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    payload = _token_cache.get(key)
+    if payload is None:
+        payload = jwt.decode(token, _SIGNING_KEY, algorithms=[settings.algorithm])
+        if "exp" in payload:
+            _token_cache[key] = payload
+    return payload
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    # Identity comes from the verified token claims alone (no DB lookup per request); FastAPI
+    # also reuses this dependency's result for every Depends(get_current_user) within a request.
     try:
-        payload = jwt.decode(credentials.credentials, settings.secret_key, algorithms=[settings.algorithm])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+        payload = decode_access_token(credentials.credentials)
+    except jwt.PyJWTError:
+        raise _credentials_exception()
+    
+    user_id = payload.get("sub")
+    if user_id is None:
+        raise _credentials_exception()
     
-    # Verify user exists in database
-    # Note: We would need a find_user_by_id function, but for now we'll return user_id
-    # since the JWT token is valid and was issued when the user existed
-    return {"user_id": user_id}
\ No newline at end of file
+    return {"user_id": user_id}
@@ -1,19 +1,67 @@
 import os
+import logging
 import uuid
+import asyncio
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
+import cloudinary.api_client.call_api
+import cloudinary.utils
+from urllib3.util import Retry
 from fastapi import UploadFile, HTTPException, status
 from config import settings
 from typing import Dict, Any
 
-# Configure Cloudinary
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 6_000_000
+# Kept-alive connections per Cloudinary host; sized for concurrent to_thread workers
+HTTP_POOL_MAXSIZE = 32
+
+_configured = False
+
+# Configure Cloudinary (once per process; called from the app lifespan)
 def configure_cloudinary():
+    global _configured
+    if _configured:
+        return
     cloudinary.config(
         cloud_name=settings.cloudinary_cloud_name,
         api_key=settings.cloudinary_api_key,
         api_secret=settings.cloudinary_api_secret
     )
+    # The SDK's shared PoolManagers hold a single connection per host, so concurrent
+    # uploads/deletes each paid a fresh TLS handshake. Swap in one wider, kept-alive pool.
+    http = cloudinary.utils.get_http_connector(
+        cloudinary.config(),
+        {
+            **cloudinary.CERT_KWARGS,
+            "maxsize": HTTP_POOL_MAXSIZE,
+            "retries": Retry(total=3, backoff_factor=0.2),
+        },
+    )
+    cloudinary.uploader._http = http
+    cloudinary.api_client.call_api._http = http
+    _configured = True
+
+class _KeepOpen:
+    """Proxy for an upload's file whose close() is a no-op: upload_large reads the file inside
+    a `with` block, which would otherwise close the UploadFile for the rest of the request."""
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+
+    def __getattr__(self, name):
+        return getattr(self._fileobj, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def close(self):
+        pass
 
 class CloudinaryService:
     @staticmethod
@@ -26,8 +74,6 @@ class CloudinaryService:
         """
         Upload file to Cloudinary and return metadata
         """
-        configure_cloudinary()
-        
         # Validate file - check if file has content and can be read
         if not file or not file.filename:
             raise HTTPException(
@@ -35,14 +81,19 @@ class CloudinaryService:
                 detail="Invalid file: no filename provided"
             )
         
-        # Read file content
-        file_content = await file.read()
-        file_size = len(file_content)
+        # Determine size without reading the body into memory
+        file_size = file.size
+        if file_size is None:
+            file.file.seek(0, os.SEEK_END)
+            file_size = file.file.tell()
+        file.file.seek(0)
         
-        # Reset file position for upload
-        await file.seek(0)
-        
-        # Check file size
+        # Check file size (upload_large sends no chunk for an empty file and returns None)
+        if file_size == 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid file: file is empty"
+            )
         if file_size > settings.max_file_size:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -63,9 +114,13 @@ class CloudinaryService:
             resource_type = "raw"
         
         try:
-            # Upload to Cloudinary WITHOUT upload preset (simpler)
-            result = cloudinary.uploader.upload(
-                file_content,
+            # Stream the spooled file to Cloudinary in chunks (no full in-memory copy).
+            # The SDK is blocking, so run it in a worker thread to keep the event loop free.
+            result = await asyncio.to_thread(
+                cloudinary.uploader.upload_large,
+                _KeepOpen(file.file),
+                filename=filename,
+                chunk_size=UPLOAD_CHUNK_SIZE,
                 public_id=unique_id,
                 resource_type=resource_type,
                 folder="vau_media",
@@ -98,17 +153,16 @@ class CloudinaryService:
         """
         Delete file from Cloudinary
         """
-        configure_cloudinary()
-        
         try:
-            result = cloudinary.uploader.destroy(
+            result = await asyncio.to_thread(
+                cloudinary.uploader.destroy,
                 public_id,
                 resource_type=resource_type,
                 invalidate=True
             )
             return result.get("result") == "ok"
         except Exception as e:
-            print(f"Error deleting file: {e}")
+            logger.warning("Error deleting file %s: %s", public_id, e)
             return False
     
     @staticmethod
@@ -116,14 +170,13 @@ class CloudinaryService:
         """
         Get file information from Cloudinary
         """
-        configure_cloudinary()
-        
         try:
-            result = cloudinary.api.resource(
+            result = await asyncio.to_thread(
+                cloudinary.api.resource,
                 public_id,
                 resource_type=resource_type
             )
             return result
         except Exception as e:
-            print(f"Error getting file info: {e}")
+            logger.warning("Error getting file info %s: %s", public_id, e)
             return {}
\ No newline at end of file
@@ -6,9 +6,17 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class Settings:
-    app_name: str = "Vau API"
-    app_version: str = "1.0.0"
-    debug: bool = True
+    # Read once at import; slots keep attribute access off the instance __dict__
+    __slots__ = (
+        "app_name", "app_version", "debug", "mongodb_url", "database_url", "database_name",
+        "db_pool_min_size", "db_pool_max_size", "db_pool_max_inactive_lifetime",
+        "db_statement_cache_size", "db_command_timeout",
+        "secret_key", "algorithm", "access_token_expire_minutes",
+        "argon2_time_cost", "argon2_memory_cost", "argon2_parallelism",
+        "cloudinary_cloud_name", "cloudinary_api_key", "cloudinary_api_secret", "cloudinary_upload_preset",
+        "upload_dir", "max_file_size",
+        "cors_origins", "cors_origin_regex", "cors_max_age",
+    )
     
     def __init__(self):
         # Load from environment variables - WITH .env SUPPORT
@@ -19,12 +27,26 @@ class Settings:
         self.database_url = os.getenv("DATABASE_URL", "")
         self.database_name = os.getenv("DATABASE_NAME", "vau_db")
         
+        # asyncpg pool (set DB_STATEMENT_CACHE_SIZE=0 behind PgBouncer in transaction mode)
+        self.db_pool_min_size = int(os.getenv("DB_POOL_MIN_SIZE", "10"))
+        self.db_pool_max_size = int(os.getenv("DB_POOL_MAX_SIZE", "50"))
+        self.db_pool_max_inactive_lifetime = float(os.getenv("DB_POOL_MAX_INACTIVE_LIFETIME", "300"))
+        self.db_statement_cache_size = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "200"))
+        self.db_command_timeout = float(os.getenv("DB_COMMAND_TIMEOUT", "15"))
+        
         # Security
         self.secret_key = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
         self.algorithm = os.getenv("ALGORITHM", "HS256")
         access_token_env = os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES")
         self.access_token_expire_minutes = int(access_token_env) if access_token_env else 30
         
+        # Password hashing (argon2id). Defaults follow the OWASP minimum (m=19 MiB, t=2, p=1):
+        # raising them makes offline cracking costlier but adds login/register latency and RAM per hash.
+        # Existing hashes keep verifying with the parameters they were created with.
+        self.argon2_time_cost = int(os.getenv("ARGON2_TIME_COST", "2"))
+        self.argon2_memory_cost = int(os.getenv("ARGON2_MEMORY_COST", "19456"))
+        self.argon2_parallelism = int(os.getenv("ARGON2_PARALLELISM", "1"))
+        
         # Cloudinary - LOAD FROM .env FILE
         self.cloudinary_cloud_name = os.getenv("CLOUDINARY_CLOUD_NAME", "")
         self.cloudinary_api_key = os.getenv("CLOUDINARY_API_KEY", "")
@@ -35,5 +57,11 @@ class Settings:
         self.upload_dir = os.getenv("UPLOAD_DIR", "uploads")
         max_file_env = os.getenv("MAX_FILE_SIZE")
         self.max_file_size = int(max_file_env) if max_file_env else 100 * 1024 * 1024
+        
+        # CORS - comma-separated origins and/or a regex; preflight cached by browsers for max_age seconds
+        self.cors_origins = [o.strip() for o in os.getenv("CORS_ORIGINS", "*").split(",") if o.strip()]
+        self.cors_origin_regex = os.getenv("CORS_ORIGIN_REGEX") or None
+        cors_max_age_env = os.getenv("CORS_MAX_AGE")
+        self.cors_max_age = int(cors_max_age_env) if cors_max_age_env else 86400
 
 settings = Settings()
@@ -0,0 +1,2 @@
+# Repository root conftest: pytest puts this directory on sys.path once (rootdir-relative
+# imports such as `from main import app` in tests/), so test modules need no path setup.
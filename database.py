@@ -1,13 +1,24 @@
 import asyncpg
-from typing import Optional, Dict, Any, List
+import logging
+from typing import Optional, Dict, Any, List, Literal, Tuple
 from datetime import datetime
-import json
+import msgspec
+import orjson
+from cachetools import TTLCache
 from config import settings
 
+logger = logging.getLogger(__name__)
+
 # PostgreSQL Database Configuration (loaded from .env via config)
 DATABASE_URL = settings.database_url
 DATABASE_NAME = settings.database_name
 
+# Batches at least this large are written with COPY instead of executemany
+BULK_COPY_THRESHOLD = 100
+
+# Server-side UTC timestamp for the naive TIMESTAMP columns
+UTC_NOW = "(NOW() AT TIME ZONE 'utc')"
+
 # Database connection pool
 class PostgreSQLDatabase:
     pool: Optional[asyncpg.Pool] = None
@@ -16,15 +27,38 @@ class PostgreSQLDatabase:
         """Initialize PostgreSQL connection pool"""
         if not DATABASE_URL:
             raise RuntimeError("DATABASE_URL no configurado. Define DATABASE_URL en el .env")
-        self.pool = await asyncpg.create_pool(DATABASE_URL, min_size=2, max_size=10, command_timeout=60)
-        print(f"✅ Connected to PostgreSQL: {DATABASE_NAME}")
+        # Every query below is a constant SQL string, so asyncpg's per-connection statement
+        # cache prepares it once per connection and later calls skip parse/plan entirely.
+        self.pool = await asyncpg.create_pool(
+            DATABASE_URL,
+            min_size=settings.db_pool_min_size,
+            max_size=settings.db_pool_max_size,
+            max_inactive_connection_lifetime=settings.db_pool_max_inactive_lifetime,
+            statement_cache_size=settings.db_statement_cache_size,
+            max_cached_statement_lifetime=0,
+            command_timeout=settings.db_command_timeout,
+            init=self._init_connection
+        )
+        logger.info("Connected to PostgreSQL: %s", DATABASE_NAME)
         await self.create_tables()
     
+    @staticmethod
+    async def _init_connection(conn):
+        """Encode/decode JSONB columns as Python objects via orjson.
+        Binary format (version byte 1 + JSON text) so composite rows decode too."""
+        await conn.set_type_codec(
+            "jsonb",
+            encoder=lambda value: b"\x01" + orjson.dumps(value),
+            decoder=lambda data: orjson.loads(data[1:]),
+            schema="pg_catalog",
+            format="binary"
+        )
+    
     async def disconnect(self):
         """Close PostgreSQL connection pool"""
         if self.pool:
             await self.pool.close()
-            print("🔌 Disconnected from PostgreSQL")
+            logger.info("Disconnected from PostgreSQL")
     
     async def create_tables(self):
         """Create tables if they don't exist"""
@@ -59,17 +93,17 @@ class PostgreSQLDatabase:
                 await conn.execute("""
                     ALTER TABLE projects ADD COLUMN IF NOT EXISTS status BOOLEAN DEFAULT true
                 """)
-                print("✅ Added status column to projects table")
+                logger.debug("Ensured status column on projects table")
             except Exception as e:
-                print(f"ℹ️ Status column already exists or error: {e}")
+                logger.debug("Status column already exists or error: %s", e)
             
             try:
                 await conn.execute("""
                     ALTER TABLE nodes ADD COLUMN IF NOT EXISTS node_order INTEGER
                 """)
-                print("✅ Added node_order column to nodes table")
+                logger.debug("Ensured node_order column on nodes table")
             except Exception as e:
-                print(f"ℹ️ node_order column already exists or error: {e}")
+                logger.debug("node_order column already exists or error: %s", e)
             
             # Nodes table
             await conn.execute("""
@@ -86,6 +120,22 @@ class PostgreSQLDatabase:
                 )
             """)
             
+            # Per-project node_order counter, bumped by the same statement that appends a node.
+            # Existing projects start from their current MAX(node_order).
+            await conn.execute("""
+                ALTER TABLE projects ADD COLUMN IF NOT EXISTS last_node_order INTEGER
+            """)
+            await conn.execute("""
+                UPDATE projects p
+                SET last_node_order = COALESCE((SELECT MAX(node_order) FROM nodes WHERE project_id = p.id), 0)
+                WHERE last_node_order IS NULL
+            """)
+            await conn.execute("""
+                ALTER TABLE projects
+                ALTER COLUMN last_node_order SET DEFAULT 0,
+                ALTER COLUMN last_node_order SET NOT NULL
+            """)
+            
             # Edges table
             await conn.execute("""
                 CREATE TABLE IF NOT EXISTS edges (
@@ -138,37 +188,151 @@ class PostgreSQLDatabase:
             except Exception:
                 pass
             
-            print("📋 Database tables verified/created")
+            # Timestamps are stamped by PostgreSQL, stored as naive UTC like before
+            for table in ("users", "projects", "nodes", "edges", "media"):
+                await conn.execute(f"""
+                    ALTER TABLE {table}
+                    ALTER COLUMN created_at SET DEFAULT {UTC_NOW},
+                    ALTER COLUMN updated_at SET DEFAULT {UTC_NOW}
+                """)
+            
+            # Indexes matching the WHERE/ORDER BY of the list queries
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_projects_user_updated ON projects(user_id, updated_at DESC);
+                CREATE INDEX IF NOT EXISTS idx_nodes_project_created ON nodes(project_id, created_at);
+                CREATE INDEX IF NOT EXISTS idx_nodes_project_order ON nodes(project_id, node_order DESC);
+                CREATE INDEX IF NOT EXISTS idx_edges_project_created ON edges(project_id, created_at);
+                CREATE INDEX IF NOT EXISTS idx_edges_source ON edges(source);
+                CREATE INDEX IF NOT EXISTS idx_edges_target ON edges(target);
+                CREATE INDEX IF NOT EXISTS idx_media_user_created ON media(user_id, created_at DESC);
+                CREATE INDEX IF NOT EXISTS idx_media_project ON media(project_id) WHERE project_id IS NOT NULL;
+                CREATE INDEX IF NOT EXISTS idx_media_user_lower_type ON media(user_id, lower(type), created_at DESC);
+            """)
+            
+            logger.info("Database tables verified/created")
 
 # Global database instance
 db_instance = PostgreSQLDatabase()
 
-# Collection functions (compatibility layer)
-async def get_users_collection():
-    return db_instance
+# Updatable columns in a fixed order: the same column set always yields the same SQL
+# text, so asyncpg's per-connection statement cache reuses the prepared statement
+# instead of parsing/planning a new one for each key ordering.
+_PROJECT_UPDATE_COLUMNS = ("title", "description", "status")
+_MEDIA_UPDATE_COLUMNS = ("title", "description", "type", "status", "ext", "url", "size", "bucket_id")
+_USER_UPDATE_COLUMNS = ("name", "password")
 
-async def get_projects_collection():
-    return db_instance
+# UPDATE ... SET templates cached per (table, column set)
+_update_sql_cache = {}
 
-async def get_nodes_collection():
-    return db_instance
+def _update_statement(table, allowed_columns, returning, update_data):
+    """Return (sql, params) for the whitelisted columns present in update_data.
+    The SQL expects the row id as its last parameter."""
+    columns = tuple(key for key in allowed_columns if key in update_data)
+    if not columns:
+        return None, None
+    
+    cache_key = (table, columns)
+    sql = _update_sql_cache.get(cache_key)
+    if sql is None:
+        set_clause = ", ".join(f"{column} = ${idx}" for idx, column in enumerate(columns, start=1))
+        sql = (
+            f"UPDATE {table} SET {set_clause}, updated_at = {UTC_NOW} "
+            f"WHERE id = ${len(columns) + 1} RETURNING {returning}"
+        )
+        _update_sql_cache[cache_key] = sql
+    return sql, [update_data[column] for column in columns]
+
+# Row types for list queries: built positionally from the SELECT column order and
+# encoded straight to JSON by the response class (no per-row dict or jsonable_encoder pass)
+class UserRow(msgspec.Struct):
+    id: str
+    email: str
+    password: str
+    name: str
+    createdAt: datetime
+    updatedAt: datetime
+
+class ProjectRow(msgspec.Struct):
+    id: str
+    title: str
+    description: Optional[str]
+    status: Optional[bool]
+    userId: str
+    createdAt: datetime
+    updatedAt: datetime
+
+class NodeRow(msgspec.Struct):
+    id: str
+    type: str
+    position: Any
+    data: Any
+    nodeOrder: Optional[int]
+    projectId: str
+    createdAt: datetime
+    updatedAt: datetime
+
+class EdgeRow(msgspec.Struct):
+    id: str
+    type: str
+    source: str
+    target: str
+    projectId: str
+    createdAt: datetime
+    updatedAt: datetime
+
+# Row shaping helpers for single-row lookups (asyncpg Record -> API dict)
+def _project_row(row):
+    return {
+        "id": row["id"],
+        "title": row["title"],
+        "description": row["description"],
+        "status": row["status"],
+        "userId": row["user_id"],
+        "createdAt": row["created_at"],
+        "updatedAt": row["updated_at"]
+    }
 
-async def get_media_collection():
-    return db_instance
+def _node_row(row):
+    return {
+        "id": row["id"],
+        "type": row["type"],
+        "position": row["position"],
+        "data": row["data"],
+        "nodeOrder": row["node_order"],
+        "projectId": row["project_id"],
+        "createdAt": row["created_at"],
+        "updatedAt": row["updated_at"]
+    }
 
-async def get_edges_collection():
-    return db_instance
+def _media_row(row):
+    return {
+        "id": row["id"],
+        "user_id": row["user_id"],
+        "title": row["title"],
+        "description": row["description"],
+        "size": row["size"],
+        "type": row["type"],
+        "ext": row["ext"],
+        "url": row["url"],
+        "bucket_id": row["bucket_id"],
+        "status": row["status"],
+        "project_id": row["project_id"],
+        "createdAt": row["created_at"],
+        "updatedAt": row["updated_at"]
+    }
 
 # PostgreSQL Database Operations
 async def insert_user(user_data):
+    # inserted_id is None when the id or email already exists, so callers need no pre-check
     async with db_instance.pool.acquire() as conn:
-        await conn.execute("""
-            INSERT INTO users (id, email, password, name, created_at, updated_at)
-            VALUES ($1, $2, $3, $4, $5, $6)
-            ON CONFLICT (id) DO NOTHING
+        inserted_id = await conn.fetchval("""
+            INSERT INTO users (id, email, password, name)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT DO NOTHING
+            RETURNING id
         """, user_data["id"], user_data["email"], user_data["password"], 
-             user_data["name"], datetime.utcnow(), datetime.utcnow())
-    return {"inserted_id": user_data["id"]}
+             user_data["name"])
+    return {"inserted_id": inserted_id}
 
 async def find_user(query):
     if not query or not query.get("email"):
@@ -186,10 +350,9 @@ async def find_user(query):
                 "email": row["email"],
                 "password": row["password"],
                 "name": row["name"],
-                "createdAt": row["created_at"].isoformat(),
-                "updatedAt": row["updated_at"].isoformat()
+                "createdAt": row["created_at"],
+                "updatedAt": row["updated_at"]
             }
-        print(f"❌ Project NOT found...")
     return None
 
 async def find_users():
@@ -199,23 +362,30 @@ async def find_users():
             FROM users ORDER BY created_at DESC
         """)
         
-        return [{
-            "id": row["id"],
-            "email": row["email"],
-            "password": row["password"],
-            "name": row["name"],
-            "createdAt": row["created_at"].isoformat(),
-            "updatedAt": row["updated_at"].isoformat()
-        } for row in rows]
-
-async def insert_project(project_data):
+        return [UserRow(*row) for row in rows]
+
+async def insert_project_with_graph(project_data, nodes, edges):
+    """Insert a project with its initial nodes and edges on one connection, in one transaction"""
+    project_id = project_data["id"]
+    node_records = [
+        (node["id"], node["type"], node["position"], node.get("data", {}), node.get("nodeOrder"), project_id)
+        for node in nodes
+    ]
+    edge_records = [
+        (edge["id"], edge["type"], edge["source"], edge["target"], project_id)
+        for edge in edges
+    ]
     async with db_instance.pool.acquire() as conn:
-        await conn.execute("""
-            INSERT INTO projects (id, title, description, status, user_id, created_at, updated_at)
-            VALUES ($1, $2, $3, $4, $5, $6, $7)
-        """, project_data["id"], project_data["title"], project_data["description"],
-             project_data.get("status", True), project_data["userId"], datetime.utcnow(), datetime.utcnow())
-    return {"inserted_id": project_data["id"]}
+        async with conn.transaction():
+            await conn.execute("""
+                INSERT INTO projects (id, title, description, status, user_id, last_node_order)
+                VALUES ($1, $2, $3, $4, $5, $6)
+            """, project_id, project_data["title"], project_data["description"],
+                 project_data.get("status", True), project_data["userId"],
+                 max((record[4] or 0 for record in node_records), default=0))
+            await _write_records(conn, "nodes", _NODE_COLUMNS, node_records)
+            await _write_records(conn, "edges", _EDGE_COLUMNS, edge_records)
+    return {"inserted_id": project_id}
 
 async def find_project(project_id):
     async with db_instance.pool.acquire() as conn:
@@ -225,17 +395,26 @@ async def find_project(project_id):
         """, project_id)
     
         if row:
-            return {
-                "id": row["id"],
-                "title": row["title"],
-                "description": row["description"],
-                "status": row["status"],
-                "userId": row["user_id"],
-                "createdAt": row["created_at"].isoformat(),
-                "updatedAt": row["updated_at"].isoformat()
-            }
+            return _project_row(row)
     return None
 
+# Positive ownership verdicts only: a project never changes owner, and delete_project evicts it.
+# Other workers may keep a deleted project's entry for up to ttl seconds.
+_project_owner_cache = TTLCache(maxsize=4096, ttl=5)
+
+async def user_owns_project(project_id, user_id):
+    key = (project_id, user_id)
+    if key in _project_owner_cache:
+        return True
+    
+    async with db_instance.pool.acquire() as conn:
+        owned = await conn.fetchval("""
+            SELECT EXISTS(SELECT 1 FROM projects WHERE id = $1 AND user_id = $2)
+        """, project_id, user_id)
+    if owned:
+        _project_owner_cache[key] = True
+    return owned
+
 async def find_user_projects(user_id):
     async with db_instance.pool.acquire() as conn:
         rows = await conn.fetch("""
@@ -243,52 +422,18 @@ async def find_user_projects(user_id):
             FROM projects WHERE user_id = $1 ORDER BY updated_at DESC
         """, user_id)
         
-        return [{
-            "id": row["id"],
-            "title": row["title"],
-            "description": row["description"],
-            "status": row["status"],
-            "userId": row["user_id"],
-            "createdAt": row["created_at"].isoformat(),
-            "updatedAt": row["updated_at"].isoformat()
-        } for row in rows]
+        return [ProjectRow(*row) for row in rows]
 
 async def update_project(project_id, update_data):
-    set_clauses = []
-    params = []
-    param_idx = 1
-    
-    for key, value in update_data.items():
-        if key in ["title", "description", "status"]:
-            set_clauses.append(f"{key} = ${param_idx}")
-            params.append(value)
-            param_idx += 1
-    
-    if not set_clauses:
+    sql, params = _update_statement("projects", _PROJECT_UPDATE_COLUMNS, "id, title, description, status, user_id, created_at, updated_at", update_data)
+    if sql is None:
         return None
     
-    set_clauses.append(f"updated_at = ${param_idx}")
-    params.append(datetime.utcnow())
-    params.append(project_id)
-    
     async with db_instance.pool.acquire() as conn:
-        result = await conn.fetchrow(f"""
-            UPDATE projects 
-            SET {', '.join(set_clauses)}
-            WHERE id = ${param_idx + 1}
-            RETURNING id, title, description, status, user_id, created_at, updated_at
-        """, *params)
+        result = await conn.fetchrow(sql, *params, project_id)
         
         if result:
-            return {
-                "id": result["id"],
-                "title": result["title"],
-                "description": result["description"],
-                "status": result["status"],
-                "userId": result["user_id"],
-                "createdAt": result["created_at"].isoformat(),
-                "updatedAt": result["updated_at"].isoformat()
-            }
+            return _project_row(result)
     return None
 
 async def delete_project(project_id):
@@ -296,92 +441,227 @@ async def delete_project(project_id):
         result = await conn.execute("""
             DELETE FROM projects WHERE id = $1
         """, project_id)
-        return result != "DELETE 0"
+    for key in [k for k in _project_owner_cache if k[0] == project_id]:
+        _project_owner_cache.pop(key, None)
+    return result != "DELETE 0"
 
-async def insert_node(node_data):
+# New node appended after the project's last node: bumping projects.last_node_order takes a
+# row lock that serializes concurrent appends (re-read after the wait under READ COMMITTED),
+# and as a non-key UPDATE it does not block the FK checks of edge/media inserts.
+# No project row means no counter and no insert.
+_INSERT_NODE_NEXT_ORDER_CTE = """
+    WITH p AS (
+        UPDATE projects SET last_node_order = last_node_order + 1 WHERE id = $4
+        RETURNING last_node_order
+    ), n AS (
+        INSERT INTO nodes (id, type, position, data, node_order, project_id)
+        SELECT gen_random_uuid()::text, $1, $2::jsonb, $3::jsonb, p.last_node_order, $4
+        FROM p
+        RETURNING id, node_order
+    )
+"""
+_INSERT_NODE_SQL = _INSERT_NODE_NEXT_ORDER_CTE + "SELECT id, node_order FROM n"
+# Same, plus the edge from the source node to the new one, in one atomic statement
+_INSERT_NODE_WITH_EDGE_SQL = _INSERT_NODE_NEXT_ORDER_CTE + """
+    , e AS (
+        INSERT INTO edges (id, type, source, target, project_id)
+        SELECT gen_random_uuid()::text, $5, $6, n.id, $4 FROM n
+    )
+    SELECT id, node_order FROM n
+"""
+
+async def insert_node_next_order(node_data, edge_data=None):
+    # Ids are generated by PostgreSQL; returns the new node's (id, node_order),
+    # or None when the project no longer exists (deleted since the ownership check)
+    params = [node_data["type"], node_data["position"], node_data.get("data", {}), node_data["projectId"]]
+    if edge_data is None:
+        sql = _INSERT_NODE_SQL
+    else:
+        sql = _INSERT_NODE_WITH_EDGE_SQL
+        params += [edge_data["type"], edge_data["source"]]
+    
     async with db_instance.pool.acquire() as conn:
-        await conn.execute("""
-            INSERT INTO nodes (id, type, position, data, node_order, project_id, created_at, updated_at)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-        """, node_data["id"], node_data["type"], json.dumps(node_data["position"]),
-             json.dumps(node_data.get("data", {})), node_data.get("nodeOrder"),
-             node_data["projectId"], datetime.utcnow(), datetime.utcnow())
-    return {"inserted_id": node_data["id"]}
-
-async def find_node(node_id):
+        row = await conn.fetchrow(sql, *params)
+    if row is None:
+        return None
+    return row["id"], row["node_order"]
+
+_NODE_COLUMNS = ["id", "type", "position", "data", "node_order", "project_id"]
+_EDGE_COLUMNS = ["id", "type", "source", "target", "project_id"]
+
+async def _write_records(conn, table, columns, records):
+    # Binary COPY for large batches, executemany otherwise
+    if len(records) >= BULK_COPY_THRESHOLD:
+        await conn.copy_records_to_table(table, records=records, columns=columns)
+    else:
+        placeholders = ", ".join(f"${i}" for i in range(1, len(columns) + 1))
+        await conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", records
+        )
+
+async def insert_nodes_batch(
+    nodes_by_project
+) -> Tuple[Literal["ok", "missing_project", "missing_source"], Optional[Dict[str, list]]]:
+    """Append many nodes (and their optional source edges) to one or more projects in a single transaction.
+
+    nodes_by_project maps project_id to node dicts carrying type/position/data and optionally
+    sourceNodeId/typeEdge. Either every node is inserted or none is.
+    Returns ("ok", {project_id: [(id, node_order), ...]}) in input order. Nothing is inserted
+    and ("missing_project", None) is returned when a project no longer exists (deleted since
+    the ownership check), ("missing_source", None) when a sourceNodeId is not a node of the
+    same project.
+    """
+    project_ids = sorted(nodes_by_project)
+    sources = {
+        (node["sourceNodeId"], project_id)
+        for project_id, nodes in nodes_by_project.items() for node in nodes if node.get("sourceNodeId")
+    }
+    edge_count = sum(1 for nodes in nodes_by_project.values() for node in nodes if node.get("sourceNodeId"))
+    node_count = sum(len(nodes) for nodes in nodes_by_project.values())
+    
+    async with db_instance.pool.acquire() as conn:
+        async with conn.transaction():
+            # Lock the project rows in id order so concurrent batches cannot deadlock each other.
+            # FOR NO KEY UPDATE is the lock the counter UPDATE takes anyway; it leaves FK checks free.
+            locked = await conn.fetch(
+                "SELECT 1 FROM projects WHERE id = ANY($1::text[]) ORDER BY id FOR NO KEY UPDATE",
+                project_ids
+            )
+            if len(locked) != len(project_ids):
+                return "missing_project", None
+            # Edges must stay inside their project; FOR KEY SHARE keeps the sources from being
+            # deleted before commit
+            if sources:
+                found = await conn.fetch(
+                    "SELECT id, project_id FROM nodes WHERE id = ANY($1::text[]) FOR KEY SHARE",
+                    list({source_id for source_id, _ in sources})
+                )
+                if not sources <= {tuple(row) for row in found}:
+                    return "missing_source", None
+            # Reserve each project's node_order range in one statement; returns the new counters
+            last_orders = dict(await conn.fetch("""
+                UPDATE projects p SET last_node_order = p.last_node_order + c.added
+                FROM unnest($1::text[], $2::int[]) AS c(id, added)
+                WHERE p.id = c.id
+                RETURNING p.id, p.last_node_order
+            """, project_ids, [len(nodes_by_project[project_id]) for project_id in project_ids]))
+            # Ids come from PostgreSQL like every other insert path
+            ids = iter(await conn.fetchval(
+                "SELECT array_agg(gen_random_uuid()::text) FROM generate_series(1, $1)",
+                node_count + edge_count
+            ))
+            
+            created = {}
+            node_records = []
+            edge_records = []
+            for project_id, nodes in nodes_by_project.items():
+                last_order = last_orders[project_id] - len(nodes)
+                created[project_id] = []
+                for offset, node in enumerate(nodes, start=1):
+                    node_id = next(ids)
+                    node_records.append(
+                        (node_id, node["type"], node["position"], node.get("data", {}), last_order + offset, project_id)
+                    )
+                    created[project_id].append((node_id, last_order + offset))
+                    if node.get("sourceNodeId"):
+                        edge_records.append(
+                            (next(ids), node.get("typeEdge", "default"), node["sourceNodeId"], node_id, project_id)
+                        )
+            await _write_records(conn, "nodes", _NODE_COLUMNS, node_records)
+            if edge_records:
+                await _write_records(conn, "edges", _EDGE_COLUMNS, edge_records)
+    return "ok", created
+
+async def find_node_for_user(node_id, user_id):
+    # Node lookup and ownership check in one round-trip; None when missing or not owned
     async with db_instance.pool.acquire() as conn:
         row = await conn.fetchrow("""
-            SELECT id, type, position, data, node_order, project_id, created_at, updated_at
-            FROM nodes WHERE id = $1
-        """, node_id)
-        
-        if row:
-            return {
-                "id": row["id"],
-                "type": row["type"],
-                "position": row["position"],
-                "data": row["data"],
-                "nodeOrder": row["node_order"],
-                "projectId": row["project_id"],
-                "createdAt": row["created_at"].isoformat(),
-                "updatedAt": row["updated_at"].isoformat()
-            }
-    return None
+            SELECT n.id, n.type, n.position, n.data, n.node_order, n.project_id, n.created_at, n.updated_at
+            FROM nodes n JOIN projects p ON p.id = n.project_id
+            WHERE n.id = $1 AND p.user_id = $2
+        """, node_id, user_id)
+    
+    return _node_row(row) if row else None
 
-async def find_project_nodes(project_id):
+async def node_auth(node_id, user_id) -> Literal["ok", "missing", "forbidden"]:
+    # Existence and ownership in one round-trip, so callers can still tell 404 from 403
     async with db_instance.pool.acquire() as conn:
-        rows = await conn.fetch("""
-            SELECT id, type, position, data, node_order, project_id, created_at, updated_at
-            FROM nodes WHERE project_id = $1 ORDER BY node_order ASC, created_at ASC
-        """, project_id)
-        
-        return [{
-            "id": row["id"],
-            "type": row["type"],
-            "position": row["position"],
-            "data": row["data"],
-            "nodeOrder": row["node_order"],
-            "projectId": row["project_id"],
-            "createdAt": row["created_at"].isoformat(),
-            "updatedAt": row["updated_at"].isoformat()
-        } for row in rows]
-
-async def insert_edge(edge_data):
+        row = await conn.fetchrow("""
+            SELECT (n.id IS NOT NULL) AS node_exists, (p.user_id = $2) AS owns
+            FROM (SELECT 1) x
+            LEFT JOIN nodes n ON n.id = $1
+            LEFT JOIN projects p ON p.id = n.project_id
+        """, node_id, user_id)
+    if not row["node_exists"]:
+        return "missing"
+    return "ok" if row["owns"] else "forbidden"
+
+async def delete_node_for_user(node_id, user_id):
+    # Ownership check, node delete and delete of its incoming/outgoing edges in one atomic statement
     async with db_instance.pool.acquire() as conn:
-        await conn.execute("""
-            INSERT INTO edges (id, type, source, target, project_id, created_at, updated_at)
-            VALUES ($1, $2, $3, $4, $5, $6, $7)
-        """, edge_data["id"], edge_data["type"], edge_data["source"],
-             edge_data["target"], edge_data["projectId"],
-             datetime.utcnow(), datetime.utcnow())
-    return {"inserted_id": edge_data["id"]}
-
-async def find_edges(project_id):
+        deleted_id = await conn.fetchval("""
+            WITH owned AS (
+                SELECT n.id FROM nodes n JOIN projects p ON p.id = n.project_id
+                WHERE n.id = $1 AND p.user_id = $2
+            ), del_edges AS (
+                -- UNION ALL instead of OR so each side can use its own index
+                DELETE FROM edges WHERE id IN (
+                    SELECT e.id FROM edges e JOIN owned o ON e.source = o.id
+                    UNION ALL
+                    SELECT e.id FROM edges e JOIN owned o ON e.target = o.id
+                )
+            )
+            DELETE FROM nodes WHERE id IN (SELECT id FROM owned)
+            RETURNING id
+        """, node_id, user_id)
+    return deleted_id is not None
+
+async def update_node_for_user(node_id, user_id, node_type, position, data):
+    # None leaves the column as is; returns False when the node is missing or not owned
     async with db_instance.pool.acquire() as conn:
-        rows = await conn.fetch("""
-            SELECT id, type, source, target, project_id, created_at, updated_at
-            FROM edges WHERE project_id = $1 ORDER BY created_at ASC
+        updated_id = await conn.fetchval(f"""
+            UPDATE nodes
+            SET type = COALESCE($1, type),
+                position = COALESCE($2::jsonb, position),
+                data = COALESCE($3::jsonb, data),
+                updated_at = {UTC_NOW}
+            WHERE id = $4 AND project_id IN (SELECT id FROM projects WHERE user_id = $5)
+            RETURNING id
+        """, node_type, position, data, node_id, user_id)
+    return updated_id is not None
+
+async def load_project_bundle(project_id):
+    """Fetch a project with its nodes and edges in a single round trip"""
+    async with db_instance.pool.acquire() as conn:
+        row = await conn.fetchrow("""
+            SELECT p.id, p.title, p.description, p.status, p.user_id, p.created_at, p.updated_at,
+                   ARRAY(SELECT ROW(n.id, n.type, n.position, n.data, n.node_order,
+                                    n.project_id, n.created_at, n.updated_at)
+                         FROM nodes n WHERE n.project_id = p.id
+                         ORDER BY n.node_order ASC, n.created_at ASC) AS nodes,
+                   ARRAY(SELECT ROW(e.id, e.type, e.source, e.target,
+                                    e.project_id, e.created_at, e.updated_at)
+                         FROM edges e WHERE e.project_id = p.id
+                         ORDER BY e.created_at ASC) AS edges
+            FROM projects p WHERE p.id = $1
         """, project_id)
         
-        return [{
-            "id": row["id"],
-            "type": row["type"],
-            "source": row["source"],
-            "target": row["target"],
-            "projectId": row["project_id"],
-            "createdAt": row["created_at"].isoformat(),
-            "updatedAt": row["updated_at"].isoformat()
-        } for row in rows]
+        if row:
+            project = _project_row(row)
+            project["nodes"] = [NodeRow(*node) for node in row["nodes"]]
+            project["edges"] = [EdgeRow(*edge) for edge in row["edges"]]
+            return project
+    return None
 
 async def insert_media(media_data):
     async with db_instance.pool.acquire() as conn:
         await conn.execute("""
-            INSERT INTO media (id, user_id, title, description, size, type, ext, url, bucket_id, created_at, updated_at, project_id)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
+            INSERT INTO media (id, user_id, title, description, size, type, ext, url, bucket_id, project_id)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
         """, media_data["id"], media_data["user_id"], media_data["title"],
              media_data.get("description", ""), media_data.get("size", 0),
              media_data["type"], media_data.get("ext", ""), media_data["url"], media_data.get("bucket_id"),
-             datetime.utcnow(), datetime.utcnow(), media_data.get("project_id"))
+             media_data.get("project_id"))
     return {"inserted_id": media_data["id"]}
 
 async def find_media(query=None):
@@ -419,64 +699,44 @@ async def find_media(query=None):
                 FROM media ORDER BY created_at DESC
             """)
     
-    return [{
-        "id": row["id"],
-        "user_id": row["user_id"],
-        "title": row["title"],
-        "description": row["description"],
-        "size": row["size"],
-        "type": row["type"],
-        "ext": row["ext"],
-        "url": row["url"],
-        "bucket_id": row["bucket_id"],
-        "status": row["status"],
-        "project_id": row["project_id"],
-        "createdAt": row["created_at"].isoformat(),
-        "updatedAt": row["updated_at"].isoformat()
-    } for row in rows]
+    return [_media_row(row) for row in rows]
 
-async def update_media(media_id, update_data):
-    set_clauses = []
-    params = []
-    param_idx = 1
+# Stored type spellings (lowercased) accepted for each listing kind, including legacy typos
+MEDIA_KIND_TYPES = {
+    "image": ["image", "imege"],
+    "video": ["video"],
+}
+
+async def find_media_by_kind(user_id, kind):
+    # Case-insensitive type filter served by idx_media_user_lower_type
+    async with db_instance.pool.acquire() as conn:
+        rows = await conn.fetch("""
+            SELECT id, user_id, title, description, size, type, ext, url, bucket_id, status, created_at, updated_at, project_id
+            FROM media WHERE user_id = $1 AND lower(type) = ANY($2::text[])
+            ORDER BY created_at DESC
+        """, user_id, MEDIA_KIND_TYPES[kind])
     
-    for key, value in update_data.items():
-        if key in ["title", "description", "type", "status", "ext", "url", "size", "bucket_id"]:
-            set_clauses.append(f"{key} = ${param_idx}")
-            params.append(value)
-            param_idx += 1
+    return [_media_row(row) for row in rows]
+
+async def find_media_by_id(media_id, user_id):
+    # Single owned row by primary key; None when missing or owned by someone else
+    async with db_instance.pool.acquire() as conn:
+        row = await conn.fetchrow("""
+            SELECT id, user_id, title, description, size, type, ext, url, bucket_id, status, created_at, updated_at, project_id
+            FROM media WHERE id = $1 AND user_id = $2
+        """, media_id, user_id)
     
-    if not set_clauses:
+    return _media_row(row) if row else None
+
+async def update_media(media_id, update_data):
+    sql, params = _update_statement("media", _MEDIA_UPDATE_COLUMNS, "id, user_id, title, description, size, type, ext, url, bucket_id, status, created_at, updated_at, project_id", update_data)
+    if sql is None:
         return None
     
-    set_clauses.append(f"updated_at = ${param_idx}")
-    params.append(datetime.utcnow())
-    params.append(media_id)
-    
     async with db_instance.pool.acquire() as conn:
-        result = await conn.fetchrow(f"""
-            UPDATE media 
-            SET {', '.join(set_clauses)}
-            WHERE id = ${param_idx + 1}
-            RETURNING id, user_id, title, description, size, type, ext, url, bucket_id, status, created_at, updated_at
-        """, *params)
-        
-        if result:
-            return {
-                "id": result["id"],
-                "user_id": result["user_id"],
-                "title": result["title"],
-                "description": result["description"],
-                "size": result["size"],
-                "type": result["type"],
-                "ext": result["ext"],
-                "url": result["url"],
-                "bucket_id": result["bucket_id"],
-                "status": result["status"],
-                "createdAt": result["created_at"].isoformat(),
-                "updatedAt": result["updated_at"].isoformat()
-            }
-    return None
+        result = await conn.fetchrow(sql, *params, media_id)
+    
+    return _media_row(result) if result else None
 
 async def delete_media(media_id):
     async with db_instance.pool.acquire() as conn:
@@ -498,36 +758,18 @@ async def find_user_by_id(user_id):
                 "email": row["email"],
                 "password": row["password"],
                 "name": row["name"],
-                "createdAt": row["created_at"].isoformat(),
-                "updatedAt": row["updated_at"].isoformat()
+                "createdAt": row["created_at"],
+                "updatedAt": row["updated_at"]
             }
     return None
 
 async def update_user(user_id, update_data):
-    set_clauses = []
-    params = []
-    param_idx = 1
-    
-    for key, value in update_data.items():
-        if key in ["name", "password"]:
-            set_clauses.append(f"{key} = ${param_idx}")
-            params.append(value)
-            param_idx += 1
-    
-    if not set_clauses:
+    sql, params = _update_statement("users", _USER_UPDATE_COLUMNS, "id, email, password, name, created_at, updated_at", update_data)
+    if sql is None:
         return None
     
-    set_clauses.append(f"updated_at = ${param_idx}")
-    params.append(datetime.utcnow())
-    params.append(user_id)
-    
     async with db_instance.pool.acquire() as conn:
-        result = await conn.fetchrow(f"""
-            UPDATE users 
-            SET {', '.join(set_clauses)}
-            WHERE id = ${param_idx + 1}
-            RETURNING id, email, password, name, created_at, updated_at
-        """, *params)
+        result = await conn.fetchrow(sql, *params, user_id)
         
         if result:
             return {
@@ -535,9 +777,8 @@ async def update_user(user_id, update_data):
                 "email": result["email"],
                 "password": result["password"],
                 "name": result["name"],
-                "createdAt": result["created_at"].isoformat(),
-                "updatedAt": result["updated_at"].isoformat()
+                "createdAt": result["created_at"],
+                "updatedAt": result["updated_at"]
             }
     return None
 
-print(f"✅ PostgreSQL database module initialized")
@@ -1,4 +1,5 @@
 import os
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
@@ -10,53 +11,59 @@ load_dotenv()
 from routers import auth, projects, nodes, media
 from config import settings
 from database import db_instance
-import cloudinary
+from cloudinary_service import configure_cloudinary
+from responses import FastJSONResponse
+
+logging.basicConfig(
+    level=logging.DEBUG if settings.debug else logging.INFO,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    print("Starting FastAPI with PostgreSQL + Cloudinary")
-    print(f"PostgreSQL URL: {settings.database_url}")
-    print(f"Cloudinary Cloud: {settings.cloudinary_cloud_name}")
+    logger.info("Starting FastAPI with PostgreSQL + Cloudinary")
+    logger.debug("PostgreSQL URL: %s", settings.database_url)
+    logger.info("Cloudinary Cloud: %s", settings.cloudinary_cloud_name)
     
     # Initialize Cloudinary
     try:
-        cloudinary.config(
-            cloud_name=settings.cloudinary_cloud_name,
-            api_key=settings.cloudinary_api_key,
-            api_secret=settings.cloudinary_api_secret
-        )
-        print("🚀 Cloudinary configured successfully")
+        configure_cloudinary()
+        logger.info("Cloudinary configured successfully")
     except Exception as e:
-        print(f"❌ Cloudinary configuration failed: {e}")
+        logger.error("Cloudinary configuration failed: %s", e)
     
     # Initialize PostgreSQL connection
     try:
         await db_instance.connect()
-        print("🚀 Database connection established successfully")
+        logger.info("Database connection established successfully")
     except Exception as e:
-        print(f"❌ Database connection failed: {e}")
+        logger.error("Database connection failed: %s", e)
         raise e
     
     yield
     # Shutdown
-    print("Shutting down FastAPI")
+    logger.info("Shutting down FastAPI")
     await db_instance.disconnect()
 
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
     debug=settings.debug,
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, specify your React app URL
+    allow_origins=settings.cors_origins,  # In production, set CORS_ORIGINS to your React app URL
+    allow_origin_regex=settings.cors_origin_regex,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=settings.cors_max_age,
 )
 
 # Include routers
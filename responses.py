@@ -0,0 +1,18 @@
+from typing import Any
+
+import msgspec
+from fastapi.responses import JSONResponse
+
+_encoder = msgspec.json.Encoder()
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with msgspec.
+    Handles plain dicts/lists and the msgspec.Struct rows returned by database.py;
+    naive datetimes serialize exactly like datetime.isoformat().
+    Returning it directly from a handler also skips FastAPI's jsonable_encoder pass.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return _encoder.encode(content)
@@ -1,14 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import timedelta
-import uuid
-import re
+from secrets import token_hex
 
-from auth import get_password_hash, verify_password, create_access_token, get_current_user
+from cachetools import TTLCache
+
+from auth import (
+    get_password_hash_async, verify_password_async, password_needs_rehash,
+    create_access_token, get_current_user, DUMMY_PASSWORD_HASH
+)
 from database import insert_user, find_user, update_user
 from config import settings
 
 router = APIRouter(prefix="/api/auth", tags=["Autenticación"])
 
+# Recent lookup misses per email. Once an email has missed UNKNOWN_EMAIL_MISSES times, its
+# logins (credential stuffing) skip the DB until ttl seconds pass without another miss.
+# A single legitimate miss (log in, then register) is never enough to be skipped, and
+# the short ttl bounds how long another worker can refuse a brand-new account.
+UNKNOWN_EMAIL_MISSES = 3
+_unknown_emails = TTLCache(maxsize=50_000, ttl=5)
+
+# Request bodies, validated by pydantic-core before the handler runs (422 on failure)
+EMAIL_PATTERN = r"^[^@]+@[^@]+\.[^@]+"
+
+class RegisterIn(BaseModel):
+    model_config = ConfigDict(json_schema_extra={"examples": [{"email": "user@example.com", "password": "secret123", "name": "Juan"}]})
+    email: str = Field(pattern=EMAIL_PATTERN)
+    password: str = Field(min_length=1)
+    name: str = Field(min_length=1)
+
+class LoginIn(BaseModel):
+    model_config = ConfigDict(json_schema_extra={"examples": [{"email": "user@example.com", "password": "secret123"}]})
+    email: str = Field(min_length=1)
+    password: str = Field(min_length=1)
+
+class UpdatePasswordIn(BaseModel):
+    model_config = ConfigDict(json_schema_extra={"examples": [{"password": "newStrongPassword123"}]})
+    password: str = Field(min_length=1)
+
 @router.post(
     "/register",
     summary="Registro de usuario",
@@ -22,54 +52,27 @@ router = APIRouter(prefix="/api/auth", tags=["Autenticación"])
                 }
             },
         },
-        400: {"description": "Validación inválida"},
+        400: {"description": "Email ya registrado"},
+        422: {"description": "Validación inválida"},
     },
 )
-async def register(
-    user_data: dict = Body(
-        ...,
-        example={"email": "user@example.com", "password": "secret123", "name": "Juan"},
-    )
-):
-    email = user_data.get("email")
-    password = user_data.get("password")
-    name = user_data.get("name")
+async def register(user_data: RegisterIn):
+    # Create new user; the unique email constraint reports duplicates in the same round-trip
+    hashed_password = await get_password_hash_async(user_data.password)
     
-    # Validate email
-    if not email or not re.match(r"[^@]+@[^@]+\.[^@]+", email):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid email"
-        )
-    
-    # Validate required fields
-    if not password or not name:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Password and name are required"
-        )
-    
-    # Check if user already exists
-    existing_user = await find_user({"email": email})
-    if existing_user:
+    result = await insert_user({
+        "id": token_hex(16),
+        "email": user_data.email,
+        "password": hashed_password,
+        "name": user_data.name
+    })
+    _unknown_emails.pop(user_data.email, None)
+    if result["inserted_id"] is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    # Create new user
-    user_id = str(uuid.uuid4())
-    hashed_password = get_password_hash(password)
-    
-    new_user = {
-        "id": user_id,
-        "email": email,
-        "password": hashed_password,
-        "name": name
-    }
-    
-    await insert_user(new_user)
-    
     return {"message": "User registered successfully"}
 
 @router.post(
@@ -89,31 +92,35 @@ async def register(
             },
         },
         400: {"description": "Credenciales inválidas"},
+        422: {"description": "Faltan email o contraseña"},
     },
 )
-async def login(
-    credentials: dict = Body(
-        ...,
-        example={"email": "user@example.com", "password": "secret123"},
-    )
-):
-    email = credentials.get("email")
-    password = credentials.get("password")
-    
-    if not email or not password:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email and password are required"
-        )
-    
-    # Find user by email
-    user = await find_user({"email": email})
-    if not user or not verify_password(password, user["password"]):
+async def login(credentials: LoginIn):
+    email = credentials.email
+    password = credentials.password
+    
+    # Find user by email (repeated recent misses are answered from _unknown_emails without the DB).
+    # Password hashing is CPU-bound so it runs off the event loop, and unknown emails still
+    # pay for one verify so both failures take the same time.
+    misses = _unknown_emails.get(email, 0)
+    if misses >= UNKNOWN_EMAIL_MISSES:
+        user = None
+    else:
+        user = await find_user({"email": email})
+        if not user:
+            _unknown_emails[email] = misses + 1
+    if not user:
+        await verify_password_async(password, DUMMY_PASSWORD_HASH)
+    if not user or not await verify_password_async(password, user["password"]):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid credentials"
         )
     
+    # Upgrade legacy SHA-256 (or outdated argon2) hashes now that the plain password is known
+    if password_needs_rehash(user["password"]):
+        await update_user(user["id"], {"password": await get_password_hash_async(password)})
+    
     # Create access token
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
@@ -136,24 +143,18 @@ async def login(
                 "application/json": {"example": {"message": "Password updated successfully"}}
             },
         },
-        400: {"description": "Solicitud inválida"},
         404: {"description": "Usuario no encontrado"},
+        422: {"description": "Solicitud inválida"},
     },
 )
 async def update_password(
-    password_data: dict = Body(..., example={"password": "newStrongPassword123"}),
+    password_data: UpdatePasswordIn,
     current_user: dict = Depends(get_current_user)
 ):
-    password = password_data.get("password")
-    
-    if not password:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Password is required"
-        )
+    password = password_data.password
     
     # Update user password
-    hashed_password = get_password_hash(password)
+    hashed_password = await get_password_hash_async(password)
     update_data = {"password": hashed_password}
     
     updated_user = await update_user(current_user["user_id"], update_data)
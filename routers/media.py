@@ -1,15 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
 from datetime import datetime
-import uuid
+from secrets import token_hex
+import asyncio
+import logging
 
 from auth import get_current_user
-from database import insert_media as db_insert_media, find_media as db_find_media, update_media as db_update_media, delete_media as db_delete_media
+from database import insert_media as db_insert_media, find_media as db_find_media, find_media_by_id as db_find_media_by_id, find_media_by_kind as db_find_media_by_kind, update_media as db_update_media, delete_media as db_delete_media
 from cloudinary_service import CloudinaryService
+from responses import FastJSONResponse
 from config import settings
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/media", tags=["Media"])
 
+def _resource_type(media_type) -> str:
+    # Cloudinary resource type for a stored media type (tolerates the legacy "imege" spelling)
+    t = str(media_type or "").lower()
+    if "image" in t or t == "imege":
+        return "image"
+    if "video" in t:
+        return "video"
+    return "raw"
+
+class MediaPatchIn(BaseModel):
+    model_config = ConfigDict(json_schema_extra={"examples": [{"title": "Nuevo título", "description": "Nueva descripción", "type": "IMAGE"}]})
+    title: Optional[str] = None
+    description: Optional[str] = None
+    type: Optional[str] = None
+
 @router.post(
     "/upload",
     summary="Subir archivo de media",
@@ -56,7 +77,7 @@ async def upload_media(
     
     # Save metadata to PostgreSQL
     media_record = {
-        "id": str(uuid.uuid4()),
+        "id": token_hex(16),
         "user_id": current_user["user_id"],
         "title": title,
         "description": description or "",
@@ -101,7 +122,7 @@ async def get_media_files(
         media_files = await db_find_media({"user_id": current_user["user_id"], "type": type})
     else:
         media_files = await db_find_media({"user_id": current_user["user_id"]})
-    return media_files
+    return FastJSONResponse(media_files)
 
 @router.get(
     "/item/{media_id}",
@@ -119,17 +140,15 @@ async def get_media_info(
     """
     Get specific media file information
     """
-    # Get all user's media and find the specific one
-    media_files = await db_find_media({"user_id": current_user["user_id"]})
+    media = await db_find_media_by_id(media_id, current_user["user_id"])
     
-    for media in media_files:
-        if media["id"] == media_id:
-            return media
+    if not media:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Media file not found"
+        )
     
-    raise HTTPException(
-        status_code=status.HTTP_404_NOT_FOUND,
-        detail="Media file not found"
-    )
+    return media
 
 @router.patch(
     "/item/{media_id}",
@@ -138,26 +157,20 @@ async def get_media_info(
     responses={
         200: {"description": "Media actualizada"},
         400: {"description": "Solicitud inválida"},
-        404: {"description": "Media no encontrada"}
+        404: {"description": "Media no encontrada"},
+        422: {"description": "Tipos de campo inválidos"}
     }
 )
 async def update_media_endpoint(
     media_id: str,
-    media_data: dict,
+    media_data: MediaPatchIn,
     current_user: dict = Depends(get_current_user)
 ):
     """
     Update media metadata in PostgreSQL
     """
-    # Build update data
-    update_data = {}
-    
-    if "title" in media_data:
-        update_data["title"] = media_data["title"]
-    if "description" in media_data:
-        update_data["description"] = media_data["description"]
-    if "type" in media_data:
-        update_data["type"] = media_data["type"]
+    # Only the fields the client actually sent
+    update_data = media_data.model_dump(exclude_unset=True)
     
     if not update_data:
         raise HTTPException(
@@ -193,13 +206,7 @@ async def delete_media_endpoint(
     Delete media file from Cloudinary and PostgreSQL
     """
     # First get the media info to get public_id
-    media_files = await db_find_media({"user_id": current_user["user_id"]})
-    target_media = None
-    
-    for media in media_files:
-        if media["id"] == media_id:
-            target_media = media
-            break
+    target_media = await db_find_media_by_id(media_id, current_user["user_id"])
     
     if not target_media:
         raise HTTPException(
@@ -210,12 +217,11 @@ async def delete_media_endpoint(
     # Delete from Cloudinary
     try:
         public_id = target_media.get("bucket_id")
-        old_type = str(target_media.get("type", "")).lower()
-        resource_type = "image" if "image" in old_type else ("video" if "video" in old_type else "raw")
+        resource_type = _resource_type(target_media.get("type"))
         if public_id:
             await CloudinaryService.delete_file(public_id, resource_type=resource_type)
     except Exception as e:
-        print(f"Warning: Failed to delete from Cloudinary: {e}")
+        logger.warning("Failed to delete from Cloudinary: %s", e)
     
     # Delete from PostgreSQL
     deleted = await db_delete_media(media_id)
@@ -251,46 +257,33 @@ async def replace_media_file(
     - Elimina el asset anterior en Cloudinary (best-effort)
     """
     # Buscar el media del usuario por id interno
-    user_media = await db_find_media({"user_id": current_user["user_id"]})
-    target = next((m for m in user_media if m.get("id") == media_id), None)
+    target = await db_find_media_by_id(media_id, current_user["user_id"])
     if not target:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media file not found")
     
     old_url = target.get("url", "")
-    old_type = str(target.get("type", "")).lower()
-    resource_type = "image" if "image" in old_type else ("video" if "video" in old_type else "raw")
+    resource_type = _resource_type(target.get("type"))
     
-    # Eliminar asset anterior de forma estricta para no dejar archivos sueltos
-    try:
-        public_id = target.get("bucket_id")
-        if not public_id:
-            marker = "/vau_media/"
-            if old_url and marker in old_url:
-                after = old_url.split(marker, 1)[1]
-                base_id = after.split(".")[0]
-                public_id = f"vau_media/{base_id}"
-        if not public_id:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No se pudo determinar bucket_id del media para eliminar el asset anterior")
-        detected_type = None
-        for rt in ["image", "video", "raw"]:
-            info = await CloudinaryService.get_file_info(public_id, resource_type=rt)
-            if info:
-                detected_type = rt
-                break
-        deletion_ok = False
-        if detected_type:
-            deletion_ok = await CloudinaryService.delete_file(public_id, resource_type=detected_type)
-        else:
-            for rt in ["image", "video", "raw"]:
-                if await CloudinaryService.delete_file(public_id, resource_type=rt):
-                    deletion_ok = True
-                    break
-        if not deletion_ok:
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Falló la eliminación del asset anterior en el bucket")
-    except Exception:
-        raise
+    # Determinar el asset anterior a eliminar
+    public_id = target.get("bucket_id")
+    if not public_id:
+        marker = "/vau_media/"
+        if old_url and marker in old_url:
+            after = old_url.split(marker, 1)[1]
+            base_id = after.split(".")[0]
+            public_id = f"vau_media/{base_id}"
+    if not public_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No se pudo determinar bucket_id del media para eliminar el asset anterior")
+    
+    async def delete_old_asset() -> bool:
+        # The stored type tells us the resource type; non-media uploads end up as "raw"
+        if await CloudinaryService.delete_file(public_id, resource_type=resource_type):
+            return True
+        return resource_type != "raw" and await CloudinaryService.delete_file(public_id, resource_type="raw")
     
-    # Subir nuevo archivo
+    # Eliminar el asset anterior y subir el nuevo en paralelo: son independientes
+    # porque el bucket_id en BD solo se cambia al final
+    delete_task = asyncio.create_task(delete_old_asset())
     try:
         upload_result = await CloudinaryService.upload_file(
             file=file,
@@ -298,11 +291,19 @@ async def replace_media_file(
             description=target.get("description", "") or "",
             media_type=target.get("type", "IMAGE")
         )
-    except HTTPException as e:
-        raise e
+    except HTTPException:
+        await delete_task
+        raise
     except Exception as e:
+        await delete_task
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Upload failed: {str(e)}")
     
+    # Eliminación estricta para no dejar archivos sueltos: si falla, se descarta el nuevo asset
+    if not await delete_task:
+        if upload_result.get("public_id"):
+            await CloudinaryService.delete_file(upload_result["public_id"], resource_type=upload_result.get("resource_type") or resource_type)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Falló la eliminación del asset anterior en el bucket")
+    
     # Actualizar registro en BD
     update_data = {
         "url": upload_result.get("url", old_url),
@@ -351,15 +352,12 @@ async def list_user_media(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Tipo inválido. Use: all, image, video"
         )
-    # Always fetch user's media, then filter in-app to tolerate legacy values
-    all_media = await db_find_media({"user_id": current_user["user_id"]})
+    # Filter in SQL; case and legacy spellings are handled by find_media_by_kind
     if t == "all":
-        media_files = all_media
-    elif t == "video":
-        media_files = [m for m in all_media if str(m.get("type", "")).lower() in {"video"}]
-    else:  # image
-        media_files = [m for m in all_media if str(m.get("type", "")).lower() in {"image", "imege"}]
-    return {
+        media_files = await db_find_media({"user_id": current_user["user_id"]})
+    else:
+        media_files = await db_find_media_by_kind(current_user["user_id"], t)
+    return FastJSONResponse({
         "message": "Media obtenida exitosamente",
         "data": media_files
-    }
+    })
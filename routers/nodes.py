@@ -1,21 +1,63 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form
-from datetime import datetime
-import uuid
-import json
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+
+import orjson
 
 from auth import get_current_user
 from database import (
-    insert_node, find_node, find_project_nodes, 
-    insert_edge, find_edges, find_project, 
-    db_instance
+    insert_node_next_order, insert_nodes_batch, node_auth, find_node_for_user, update_node_for_user, delete_node_for_user,
+    user_owns_project
 )
 from cloudinary_service import CloudinaryService
+from responses import FastJSONResponse
 
 router = APIRouter(prefix="/api/node", tags=["Nodo"])
 
+class NodeAttributesIn(BaseModel):
+    type: Optional[str] = None
+    position: Optional[Dict[str, Any]] = None
+    data: Optional[Dict[str, Any]] = None
+
+class UpdateNodeIn(BaseModel):
+    model_config = ConfigDict(json_schema_extra={"examples": [{"attributes": {"position": {"x": 100, "y": 200}}}]})
+    attributes: NodeAttributesIn = Field(default_factory=NodeAttributesIn)
+
+class CreateNodeIn(BaseModel):
+    model_config = ConfigDict(json_schema_extra={"examples": [{
+        "projectId": "550e8400-e29b-41d4-a716-446655440000",
+        "sourceNodeId": "550e8400-e29b-41d4-a716-446655440001",
+        "typeEdge": "default",
+        "attributes": {"type": "video", "position": {"x": 100, "y": 200}, "data": {"title": "Mi nodo"}}
+    }]})
+    projectId: str = Field(min_length=1)
+    sourceNodeId: Optional[str] = None
+    typeEdge: str = "default"
+    attributes: NodeAttributesIn = Field(default_factory=NodeAttributesIn)
+
+MAX_BATCH_NODES = 1000
+
+async def node_miss_error(node_id: str, user_id: str) -> HTTPException:
+    # Owner-filtered queries only report "no row"; one discriminator query on that path picks 404 vs 403
+    if await node_auth(node_id, user_id) == "forbidden":
+        return HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Node not found"
+    )
+
+async def get_owned_node(node_id: str, user_id: str) -> dict:
+    node = await find_node_for_user(node_id, user_id)
+    if not node:
+        raise await node_miss_error(node_id, user_id)
+    return node
+
 @router.post(
     "/",
-    response_model=dict,
     summary="Crear un nuevo nodo",
     description="Crea un nuevo nodo en un proyecto existente. Opcionalmente conecta el nuevo nodo a un nodo fuente mediante una arista.",
     responses={
@@ -51,38 +93,30 @@ async def create_node(
     ),
     current_user: dict = Depends(get_current_user)
 ):
-    import json
+    # Reject unsupported files first: no JSON parsing, ownership query or upload for them
+    content_type = (file.content_type or "") if file and file.filename else None
+    if content_type is not None and not content_type.startswith(("image/", "video/")):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Solo se permiten archivos de imagen o video"
+        )
+    
     try:
-        attributes = json.loads(attributes) if isinstance(attributes, str) else attributes
-    except json.JSONDecodeError:
+        attributes = orjson.loads(attributes) if isinstance(attributes, str) else attributes
+    except orjson.JSONDecodeError:
         attributes = {}
     
-    project = await find_project(projectId)
-    
-    if not project or project["userId"] != current_user["user_id"]:
+    if not await user_owns_project(projectId, current_user["user_id"]):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
         )
     
-    async with db_instance.pool.acquire() as conn:
-        last_order_row = await conn.fetchrow("""
-            SELECT MAX(node_order) as max_order FROM nodes WHERE project_id = $1
-        """, projectId)
-        next_order = (last_order_row["max_order"] or 0) + 1
-    
-    current_time = datetime.utcnow()
-    node_id = str(uuid.uuid4())
+    # Naive UTC like the TIMESTAMP columns, taken once per request
+    current_time = datetime.now(timezone.utc).replace(tzinfo=None)
     
     file_data = None
-    if file and file.filename:
-        content_type = file.content_type or ""
-        if not content_type.startswith("image/") and not content_type.startswith("video/"):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Solo se permiten archivos de imagen o video"
-            )
-        
+    if content_type is not None:
         upload_result = await CloudinaryService.upload_file(
             file=file,
             title=attributes.get("type", "node_media"),
@@ -105,39 +139,97 @@ async def create_node(
         node_data["media"] = file_data
     
     new_node = {
-        "id": node_id,
+        "id": None,
         "type": attributes.get("type", "default"),
         "position": attributes.get("position", {"x": 0, "y": 0}),
         "data": node_data,
-        "nodeOrder": next_order,
+        "nodeOrder": None,
         "projectId": projectId,
         "createdAt": current_time,
         "updatedAt": current_time
     }
+    new_edge = {"type": typeEdge, "source": sourceNodeId} if sourceNodeId else None
+    
+    # One statement: PostgreSQL generates the ids, bumps the project's node_order counter and adds the edge
+    inserted = await insert_node_next_order(new_node, new_edge)
+    if inserted is None:
+        # The ownership cache is per process: the project may have been deleted on another worker
+        if file_data:
+            await CloudinaryService.delete_file(file_data["public_id"], resource_type=file_data["resource_type"])
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    new_node["id"], new_node["nodeOrder"] = inserted
     
-    await insert_node(new_node)
-    
-    if sourceNodeId:
-        edge_id = str(uuid.uuid4())
-        new_edge = {
-            "id": edge_id,
-            "type": typeEdge,
-            "source": sourceNodeId,
-            "target": node_id,
-            "projectId": projectId,
-            "createdAt": current_time,
-            "updatedAt": current_time
-        }
-        await insert_edge(new_edge)
-    
-    return {
+    return FastJSONResponse({
         "message": "Se ha creado el nodo exitosamente",
         "data": new_node
+    })
+
+@router.post(
+    "/batch",
+    summary="Crear nodos en lote",
+    description="Crea varios nodos (y sus aristas opcionales) en una sola solicitud. La propiedad se verifica una vez por proyecto y el lote se crea completo o no se crea. Los nodos creados se devuelven en el orden de la solicitud.",
+    responses={
+        404: {"description": "Proyecto o nodo fuente no encontrado"},
+        401: {"description": "No autorizado"},
+        400: {"description": "Lote vacio o demasiado grande"},
+        422: {"description": "Tipos de atributos invalidos"}
     }
+)
+async def batch_create(ops: List[CreateNodeIn], current_user: dict = Depends(get_current_user)):
+    if not ops or len(ops) > MAX_BATCH_NODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El lote debe contener entre 1 y {MAX_BATCH_NODES} nodos"
+        )
+    
+    # Group by project so ownership is checked and node_order reserved once per project
+    by_project: Dict[str, List[dict]] = {}
+    for op in ops:
+        attributes = op.attributes
+        by_project.setdefault(op.projectId, []).append({
+            "type": attributes.type or "default",
+            "position": attributes.position or {"x": 0, "y": 0},
+            "data": attributes.data or {},
+            "sourceNodeId": op.sourceNodeId,
+            "typeEdge": op.typeEdge
+        })
+    
+    for project_id in by_project:
+        if not await user_owns_project(project_id, current_user["user_id"]):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+    
+    # All projects go in one transaction: the batch is created entirely or not at all
+    result, rows_by_project = await insert_nodes_batch(by_project)
+    if result == "missing_project":
+        # The ownership cache is per process: a project may have been deleted on another worker
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    if result == "missing_source":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Source node not found"
+        )
+    inserted = {project_id: iter(rows) for project_id, rows in rows_by_project.items()}
+    created = []
+    for op in ops:
+        node_id, node_order = next(inserted[op.projectId])
+        created.append({"id": node_id, "nodeOrder": node_order, "projectId": op.projectId})
+    
+    return FastJSONResponse({
+        "message": "Se han creado los nodos exitosamente",
+        "data": created
+    })
 
 @router.get(
     "/details",
-    response_model=dict,
     summary="Obtener detalles de un nodo",
     description="Retorna los detalles de un nodo especifico por su ID.",
     responses={
@@ -147,94 +239,46 @@ async def create_node(
     }
 )
 async def get_node_details(id: str = Query(...), current_user: dict = Depends(get_current_user)):
-    node = await find_node(id)
+    node = await get_owned_node(id, current_user["user_id"])
     
-    if not node:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Node not found"
-        )
-    
-    project = await find_project(node["projectId"])
-    
-    if not project or project["userId"] != current_user["user_id"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
-    
-    return node
+    return FastJSONResponse(node)
 
 @router.patch(
     "/{id}",
-    response_model=dict,
     summary="Actualizar un nodo",
     description="Actualiza los atributos de un nodo existente (type, position, data).",
     responses={
         404: {"description": "Nodo no encontrado"},
         403: {"description": "Acceso denegado"},
         400: {"description": "Solicitud invalida - debe proporcionar al menos un campo"},
-        401: {"description": "No autorizado"}
+        401: {"description": "No autorizado"},
+        422: {"description": "Tipos de atributos invalidos"}
     }
 )
 async def update_node(
     id: str,
-    node_data: dict,
+    node_data: UpdateNodeIn,
     current_user: dict = Depends(get_current_user)
 ):
-    node = await find_node(id)
+    # Absent attributes stay None and the UPDATE's COALESCE keeps the stored column
+    attributes = node_data.attributes
+    node_type, position, data = attributes.type, attributes.position, attributes.data
     
-    if not node:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Node not found"
-        )
-    
-    project = await find_project(node["projectId"])
-    
-    if not project or project["userId"] != current_user["user_id"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
-    
-    update_data = {}
-    attributes = node_data.get("attributes", {})
-    
-    if "type" in attributes:
-        update_data["type"] = attributes["type"]
-    if "position" in attributes:
-        update_data["position"] = attributes["position"]
-    if "data" in attributes:
-        update_data["data"] = attributes["data"]
-    
-    if not update_data:
+    if node_type is None and position is None and data is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Al menos uno de los campos \"type\", \"position\" o \"data\" debe estar presente."
         )
     
-    async with db_instance.pool.acquire() as conn:
-        await conn.execute("""
-            UPDATE nodes 
-            SET type = COALESCE($1, type),
-                position = COALESCE($2, position),
-                data = COALESCE($3, data),
-                updated_at = $4
-            WHERE id = $5
-        """, 
-            update_data.get("type"),
-            json.dumps(update_data.get("position")) if "position" in update_data else None,
-            json.dumps(update_data.get("data")) if "data" in update_data else None,
-            datetime.utcnow(),
-            id
-        )
+    # The UPDATE itself checks ownership; only a miss pays for the 404/403 lookup
+    updated = await update_node_for_user(id, current_user["user_id"], node_type, position, data)
+    if not updated:
+        raise await node_miss_error(id, current_user["user_id"])
     
     return {"message": "Nodo actualizado exitosamente"}
 
 @router.delete(
     "/{id}",
-    response_model=dict,
     summary="Eliminar un nodo",
     description="Elimina un nodo y todas sus aristas asociadas (entrantes y salientes).",
     responses={
@@ -244,31 +288,13 @@ async def update_node(
     }
 )
 async def delete_node(id: str, current_user: dict = Depends(get_current_user)):
-    node = await find_node(id)
-    
-    if not node:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Node not found"
-        )
-    
-    project = await find_project(node["projectId"])
-    
-    if not project or project["userId"] != current_user["user_id"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
-    
-    async with db_instance.pool.acquire() as conn:
-        await conn.execute("DELETE FROM nodes WHERE id = $1", id)
-        await conn.execute("DELETE FROM edges WHERE source = $1 OR target = $1", id)
+    if not await delete_node_for_user(id, current_user["user_id"]):
+        raise await node_miss_error(id, current_user["user_id"])
     
     return {"message": "Nodo eliminado exitosamente"}
 
 @router.patch(
     "/reset/position/{id}",
-    response_model=dict,
     summary="Resetear posicion de un nodo",
     description="Resetea la posicion de un nodo a las coordenadas (0, 0).",
     responses={
@@ -278,27 +304,10 @@ async def delete_node(id: str, current_user: dict = Depends(get_current_user)):
     }
 )
 async def reset_node_position(id: str, current_user: dict = Depends(get_current_user)):
-    node = await find_node(id)
-    
-    if not node:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Node not found"
-        )
-    
-    project = await find_project(node["projectId"])
-    
-    if not project or project["userId"] != current_user["user_id"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
-    
-    async with db_instance.pool.acquire() as conn:
-        await conn.execute("""
-            UPDATE nodes 
-            SET position = $1, updated_at = $2
-            WHERE id = $3
-        """, json.dumps({"x": 0, "y": 0}), datetime.utcnow(), id)
+    updated = await update_node_for_user(
+        id, current_user["user_id"], None, {"x": 0, "y": 0}, None
+    )
+    if not updated:
+        raise await node_miss_error(id, current_user["user_id"])
     
     return {"message": "Posicion del nodo reseteada exitosamente"}
@@ -1,16 +1,14 @@
 from database import (
-    get_users_collection, get_projects_collection, 
-    get_nodes_collection, get_edges_collection, get_media_collection,
-    insert_project, find_project, find_user_projects, 
-    update_project, delete_project, find_project_nodes, find_edges,
-    insert_node, insert_edge
+    find_project, find_user_projects, 
+    update_project, delete_project, load_project_bundle,
+    insert_project_with_graph
 )
 from fastapi import APIRouter, Depends, HTTPException, status, Body
-from datetime import datetime
+from datetime import datetime, timezone
 import uuid
 
 from auth import get_current_user
-from schemas import ProjectTypes, DetailsProjectTypes, ProjectTypesResponse
+from responses import FastJSONResponse
 
 # Define el APIRouter requerido
 router = APIRouter(prefix="/api/project", tags=["Proyectos"])
@@ -55,7 +53,8 @@ async def create_project(
             detail="El título es requerido"
         )
     
-    current_time = datetime.utcnow()
+    # Naive UTC like the TIMESTAMP columns, taken once per request
+    current_time = datetime.now(timezone.utc).replace(tzinfo=None)
     project_id = str(uuid.uuid4())
     
     new_project = {
@@ -68,8 +67,6 @@ async def create_project(
         "updatedAt": current_time
     }
     
-    result = await insert_project(new_project)
-    
     start_node_id = str(uuid.uuid4())
     end_node_id = str(uuid.uuid4())
     
@@ -95,9 +92,6 @@ async def create_project(
         "updatedAt": current_time
     }
     
-    await insert_node(start_node)
-    await insert_node(end_node)
-    
     edge = {
         "id": str(uuid.uuid4()),
         "type": "default",
@@ -108,7 +102,8 @@ async def create_project(
         "updatedAt": current_time
     }
     
-    await insert_edge(edge)
+    # Project, start/end nodes and their edge in one transaction on a single connection
+    await insert_project_with_graph(new_project, [start_node, end_node], [edge])
     
     return {
         "message": "Proyecto creado exitosamente",
@@ -141,18 +136,10 @@ async def get_projects(current_user: dict = Depends(get_current_user)):
     # Obtener todos los proyectos del usuario actual
     projects = await find_user_projects(current_user["user_id"])
     
-    # Limpiar _id si existe
-    cleaned_projects = []
-    for project in projects:
-        project_dict = dict(project)
-        if "_id" in project_dict:
-            project_dict.pop("_id")
-        cleaned_projects.append(project_dict)
-    
-    return {
+    return FastJSONResponse({
         "message": "Proyectos obtenidos exitosamente",
-        "data": cleaned_projects
-    }
+        "data": projects
+    })
 
 @router.get(
     "/detail/{project_id}",
@@ -185,8 +172,8 @@ async def get_projects(current_user: dict = Depends(get_current_user)):
     },
 )
 async def get_project_details(project_id: str, current_user: dict = Depends(get_current_user)):
-    # Obtener proyecto y verificar propiedad
-    project = await find_project(project_id)
+    # Obtener proyecto con nodos y edges en una sola consulta y verificar propiedad
+    project = await load_project_bundle(project_id)
     
     if not project:
         raise HTTPException(
@@ -200,46 +187,11 @@ async def get_project_details(project_id: str, current_user: dict = Depends(get_
             detail="Acceso denegado"
         )
     
-    # Obtener nodos y edges asociados
-    nodes = await find_project_nodes(project_id)
-    edges = await find_edges(project_id)
-    
-    # Limpiar datos
-    project_dict = dict(project)
-    if "_id" in project_dict:
-        project_dict.pop("_id")
-    
-    cleaned_nodes = []
-    for node in nodes:
-        node_dict = dict(node)
-        if "_id" in node_dict:
-            node_dict.pop("_id")
-        cleaned_nodes.append(node_dict)
-    
-    cleaned_edges = []
-    for edge in edges:
-        edge_dict = dict(edge)
-        if "_id" in edge_dict:
-            edge_dict.pop("_id")
-        cleaned_edges.append(edge_dict)
-    
-    # Construir respuesta detallada
-    project_details = {
-        "id": project_dict["id"],
-        "title": project_dict["title"],
-        "userId": project_dict["userId"],
-        "description": project_dict["description"],
-        "status": project_dict.get("status", True),
-        "createdAt": project_dict["createdAt"],
-        "updatedAt": project_dict["updatedAt"],
-        "nodes": cleaned_nodes,
-        "edges": cleaned_edges
-    }
-    
-    return {
+    # El dict de load_project_bundle ya tiene la forma de la respuesta; se devuelve sin copiarlo
+    return FastJSONResponse({
         "message": "Detalles del proyecto obtenidos exitosamente",
-        "data": project_details
-    }
+        "data": project
+    })
 
 @router.patch(
     "/{project_id}",
@@ -310,8 +262,6 @@ async def update_project_endpoint(
     if status_val is not None:
         update_data["status"] = status_val
     
-    update_data["updatedAt"] = datetime.utcnow()
-    
     # Actualizar proyecto
     updated_project = await update_project(project_id, update_data)
     
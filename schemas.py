@@ -1,147 +1,143 @@
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 import re
 
+import msgspec
+
+_EMAIL_RE = re.compile(r"[^@]+@[^@]+\.[^@]+")
+
+def _utc_now() -> datetime:
+    # Naive UTC, matching the TIMESTAMP columns
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 # Simple validation classes since pydantic is having issues
 class EmailStr:
     def __init__(self, email: str):
-        if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
+        if not _EMAIL_RE.match(email):
             raise ValueError("Invalid email format")
         self.email = email
     
     def __str__(self):
         return self.email
 
-class BaseModel:
+# msgspec.Struct gives C-level constructors and is encoded natively by FastJSONResponse
+class BaseModel(msgspec.Struct):
     def dict(self):
-        return self.__dict__
+        return msgspec.structs.asdict(self)
 
 # Auth DTOs
 class RegisterDto(BaseModel):
-    def __init__(self, email: str, password: str, name: str):
-        self.email = EmailStr(email)
-        self.password = password
-        self.name = name
+    email: str
+    password: str
+    name: str
+
+    def __post_init__(self):
+        EmailStr(self.email)
 
 class LoginDto(BaseModel):
-    def __init__(self, email: str, password: str):
-        self.email = EmailStr(email)
-        self.password = password
+    email: str
+    password: str
+
+    def __post_init__(self):
+        EmailStr(self.email)
 
 class UpdatePasswordDto(BaseModel):
-    def __init__(self, password: str):
-        self.password = password
+    password: str
 
 # Auth Response Types
 class RegisterTypes(BaseModel):
-    def __init__(self, message: str):
-        self.message = message
+    message: str
 
 class LoginTypes(BaseModel):
-    def __init__(self, message: str, access_token: str):
-        self.message = message
-        self.access_token = access_token
+    message: str
+    access_token: str
 
 class UpdatePasswordTypes(BaseModel):
-    def __init__(self, message: str):
-        self.message = message
+    message: str
 
 # Project DTOs
 class UpdateProjectDto(BaseModel):
-    def __init__(self, title: Optional[str] = None, description: Optional[str] = None, status: Optional[bool] = None):
-        self.title = title
-        self.description = description
-        self.status = status
+    title: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[bool] = None
 
 # Project Types
 class ProjectTypes(BaseModel):
-    def __init__(self, id: str, title: str, userId: str, description: str, createdAt: datetime, updatedAt: datetime, status: bool = True):
-        self.id = id
-        self.title = title
-        self.userId = userId
-        self.description = description
-        self.status = status
-        self.createdAt = createdAt
-        self.updatedAt = updatedAt
+    id: str
+    title: str
+    userId: str
+    description: str
+    createdAt: datetime
+    updatedAt: datetime
+    status: bool = True
 
 class ProjectTypesResponse(BaseModel):
-    def __init__(self, message: str, data: Dict[str, Any]):
-        self.message = message
-        self.data = data
+    message: str
+    data: Dict[str, Any]
 
 # Node DTOs
 class NodePositionDto(BaseModel):
-    def __init__(self, x: int, y: int):
-        self.x = x
-        self.y = y
+    x: int
+    y: int
 
 class NodeAttributesDto(BaseModel):
-    def __init__(self, type: str, position: NodePositionDto, data: Optional[Dict[str, Any]] = None):
-        self.type = type
-        self.position = position
-        self.data = data
+    type: str
+    position: NodePositionDto
+    data: Optional[Dict[str, Any]] = None
 
 class NodeProjectDto(BaseModel):
-    def __init__(self, projectId: str, sourceNodeId: str, targetNodeId: str, attributes: NodeAttributesDto, typeEdge: Optional[str] = None):
-        self.projectId = projectId
-        self.sourceNodeId = sourceNodeId
-        self.targetNodeId = targetNodeId
-        self.attributes = attributes
-        self.typeEdge = typeEdge
+    projectId: str
+    sourceNodeId: str
+    targetNodeId: str
+    attributes: NodeAttributesDto
+    typeEdge: Optional[str] = None
 
 class NodeAttributesUpdateDto(BaseModel):
-    def __init__(self, type: Optional[str] = None, position: Optional[NodePositionDto] = None, data: Optional[Dict[str, Any]] = None):
-        self.type = type
-        self.position = position
-        self.data = data
+    type: Optional[str] = None
+    position: Optional[NodePositionDto] = None
+    data: Optional[Dict[str, Any]] = None
 
 class UpdateNodeProjectDto(BaseModel):
-    def __init__(self, attributes: NodeAttributesUpdateDto):
-        self.attributes = attributes
+    attributes: NodeAttributesUpdateDto
 
 # Node Types
 class PositionNodeTypes(BaseModel):
-    def __init__(self, x: int, y: int):
-        self.x = x
-        self.y = y
+    x: int
+    y: int
 
 class NodeTypes(BaseModel):
-    def __init__(self, id: str, type: str, position: PositionNodeTypes, data: Optional[Dict[str, Any]] = None, createdAt: datetime = None, updatedAt: datetime = None):
-        self.id = id
-        self.type = type
-        self.position = position
-        self.data = data
-        self.createdAt = createdAt or datetime.utcnow()
-        self.updatedAt = updatedAt or datetime.utcnow()
+    id: str
+    type: str
+    position: PositionNodeTypes
+    data: Optional[Dict[str, Any]] = None
+    createdAt: datetime = msgspec.field(default_factory=_utc_now)
+    updatedAt: datetime = msgspec.field(default_factory=_utc_now)
 
 class NodeTypesResponse(BaseModel):
-    def __init__(self, message: str, data: Dict[str, Any]):
-        self.message = message
-        self.data = data
+    message: str
+    data: Dict[str, Any]
 
 class DetailsNodeTypes(BaseModel):
-    def __init__(self, id: str, type: str, position: PositionNodeTypes, data: Optional[Dict[str, Any]] = None, createdAt: datetime = None, updatedAt: datetime = None, projectId: str = None):
-        self.id = id
-        self.type = type
-        self.position = position
-        self.data = data
-        self.createdAt = createdAt
-        self.updatedAt = updatedAt
-        self.projectId = projectId
+    id: str
+    type: str
+    position: PositionNodeTypes
+    data: Optional[Dict[str, Any]] = None
+    createdAt: Optional[datetime] = None
+    updatedAt: Optional[datetime] = None
+    projectId: Optional[str] = None
 
 # Project Details
 class DetailsProjectTypes(BaseModel):
-    def __init__(self, id: str, title: str, userId: str, description: str, createdAt: datetime, updatedAt: datetime, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]], status: bool = True):
-        self.id = id
-        self.title = title
-        self.userId = userId
-        self.description = description
-        self.status = status
-        self.createdAt = createdAt
-        self.updatedAt = updatedAt
-        self.nodes = nodes
-        self.edges = edges
+    id: str
+    title: str
+    userId: str
+    description: str
+    createdAt: datetime
+    updatedAt: datetime
+    nodes: List[Dict[str, Any]]
+    edges: List[Dict[str, Any]]
+    status: bool = True
 
 # Media DTOs
 class MediaType(str, Enum):
@@ -150,39 +146,34 @@ class MediaType(str, Enum):
     AUDIO = "AUDIO"
 
 class UploadMediaDto(BaseModel):
-    def __init__(self, title: str, description: Optional[str] = None, size: int = 0, type: MediaType = None, ext: str = ""):
-        self.title = title
-        self.description = description
-        self.size = size
-        self.type = type
-        self.ext = ext
+    title: str
+    description: Optional[str] = None
+    size: int = 0
+    type: Optional[MediaType] = None
+    ext: str = ""
 
 class UpdateMediaDto(BaseModel):
-    def __init__(self, title: str, description: Optional[str] = None, type: MediaType = None):
-        self.title = title
-        self.description = description
-        self.type = type
+    title: str
+    description: Optional[str] = None
+    type: Optional[MediaType] = None
 
 class DeleteMediaDto(BaseModel):
-    def __init__(self, ext: str, type: MediaType):
-        self.ext = ext
-        self.type = type
+    ext: str
+    type: MediaType
 
 # Media Types
 class UploadMediaTypes(BaseModel):
-    def __init__(self, url: str, media_id: int, contentType: str):
-        self.url = url
-        self.media_id = media_id
-        self.contentType = contentType
+    url: str
+    media_id: int
+    contentType: str
 
 class GetAllMediaTypes(BaseModel):
-    def __init__(self, id: int, user_id: str, title: str, description: Optional[str] = None, size: int = 0, ext: str = "", status: str = "", createdAt: datetime = None, updatedAt: datetime = None):
-        self.id = id
-        self.user_id = user_id
-        self.title = title
-        self.description = description
-        self.size = size
-        self.ext = ext
-        self.status = status
-        self.createdAt = createdAt or datetime.utcnow()
-        self.updatedAt = updatedAt or datetime.utcnow()
\ No newline at end of file
+    id: int
+    user_id: str
+    title: str
+    description: Optional[str] = None
+    size: int = 0
+    ext: str = ""
+    status: str = ""
+    createdAt: datetime = msgspec.field(default_factory=_utc_now)
+    updatedAt: datetime = msgspec.field(default_factory=_utc_now)
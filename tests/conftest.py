@@ -0,0 +1,36 @@
+import socket
+
+import httpx
+import pytest
+
+
+@pytest.fixture(scope="session")
+def app():
+    # Imported on first use so collecting unrelated tests does not build the FastAPI app
+    from main import app as _app
+    return _app
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    # The app schedules asyncio tasks, so only the asyncio backend applies
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def client(app):
+    # One in-process transport for the whole session
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def _no_network(monkeypatch):
+    # Any real connection attempt (a stub that stopped applying) fails immediately
+    def refuse(*args, **kwargs):
+        raise RuntimeError(f"Network access attempted in test: {args}")
+
+    monkeypatch.setattr(socket, "getaddrinfo", refuse)
+    monkeypatch.setattr(socket.socket, "connect", refuse)
+    monkeypatch.setattr(socket.socket, "connect_ex", refuse)
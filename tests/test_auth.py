@@ -0,0 +1,208 @@
+import hashlib
+import sys
+from datetime import timedelta
+
+import jwt
+import pytest
+from cachetools import TLRUCache
+
+import auth
+from auth import DUMMY_PASSWORD_HASH, create_access_token, decode_access_token, get_password_hash, verify_password
+import routers.auth as auth_router
+
+
+email = "user@example.com"
+password = "secret123"
+
+
+class _FakeUsers:
+    """Stand-in for the users table: scripted rows, recorded calls, no PostgreSQL"""
+
+    def __init__(self):
+        self.users = {}  # email -> row
+        self.find_calls = []
+        self.update_calls = []
+
+    async def find_user(self, query):
+        self.find_calls.append(query["email"])
+        return self.users.get(query["email"])
+
+    async def insert_user(self, user_data):
+        if user_data["email"] in self.users:
+            return {"inserted_id": None}
+        self.users[user_data["email"]] = dict(user_data)
+        return {"inserted_id": user_data["id"]}
+
+    async def update_user(self, user_id, update_data):
+        self.update_calls.append((user_id, update_data))
+        for user in self.users.values():
+            if user["id"] == user_id:
+                user.update(update_data)
+                return user
+        return None
+
+
+@pytest.fixture
+def users(monkeypatch):
+    fake = _FakeUsers()
+    monkeypatch.setattr(auth_router, "find_user", fake.find_user)
+    monkeypatch.setattr(auth_router, "insert_user", fake.insert_user)
+    monkeypatch.setattr(auth_router, "update_user", fake.update_user)
+    # Module-level miss counts: start every test empty
+    auth_router._unknown_emails.clear()
+    return fake
+
+
+async def _login(client, login_email=email, login_password=password):
+    return await client.post("/api/auth/login", json={"email": login_email, "password": login_password})
+
+
+@pytest.mark.anyio
+async def test_login_after_register_following_a_miss(client, users):
+    # The first miss is not cached, so the account is found right after registering
+    # (on any worker, not just the one that handled the register)
+    assert (await _login(client)).status_code == 400
+    users.users[email] = {"id": "user-123", "email": email, "password": get_password_hash(password), "name": "Juan"}
+
+    response = await _login(client)
+
+    assert response.status_code == 200, response.text
+    assert users.find_calls == [email, email]
+
+
+@pytest.mark.anyio
+async def test_repeated_misses_skip_the_db(client, users):
+    for _ in range(auth_router.UNKNOWN_EMAIL_MISSES):
+        assert (await _login(client)).status_code == 400
+
+    response = await _login(client)
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid credentials"}
+    assert users.find_calls == [email] * auth_router.UNKNOWN_EMAIL_MISSES
+
+
+@pytest.mark.anyio
+async def test_register_clears_the_miss_count(client, users):
+    for _ in range(auth_router.UNKNOWN_EMAIL_MISSES):
+        await _login(client)
+
+    response = await client.post("/api/auth/register", json={"email": email, "password": password, "name": "Juan"})
+    assert response.status_code == 200, response.text
+
+    assert (await _login(client)).status_code == 200
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Fresh token cache on a controllable clock; counts the signature verifications
+    now = [0.0]
+    decodes = []
+    real_decode = jwt.decode
+
+    def decode(*args, **kwargs):
+        decodes.append(args[0])
+        return real_decode(*args, **kwargs)
+
+    cache = TLRUCache(maxsize=16, ttu=auth._token_cache.ttu, timer=lambda: now[0])
+    monkeypatch.setattr(auth, "_token_cache", cache)
+    monkeypatch.setattr(auth.jwt, "decode", decode)
+    return now, decodes
+
+
+def test_token_cache_hit(clock):
+    _, decodes = clock
+    token = create_access_token({"sub": "user-123"})
+
+    assert decode_access_token(token)["sub"] == "user-123"
+    assert decode_access_token(token)["sub"] == "user-123"
+
+    assert decodes == [token]
+    # Keyed by a 16-byte BLAKE2b digest: the bearer token itself is never stored
+    assert list(auth._token_cache) == [hashlib.blake2b(token.encode(), digest_size=16).digest()]
+
+
+def test_token_cache_expires_with_the_token(clock):
+    now, decodes = clock
+    token = create_access_token({"sub": "user-123"}, expires_delta=timedelta(minutes=5))
+    payload = decode_access_token(token)
+
+    now[0] = payload["exp"] - 1
+    decode_access_token(token)
+    assert len(decodes) == 1
+
+    now[0] = payload["exp"]
+    assert len(auth._token_cache) == 0
+    decode_access_token(token)
+    assert len(decodes) == 2
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("token", [
+    "not-a-jwt",
+    create_access_token({"sub": "user-123"}, expires_delta=timedelta(seconds=-1)),
+    create_access_token({"name": "no-subject"}),
+], ids=["malformed", "expired", "no_subject"])
+async def test_invalid_token_is_401(client, clock, token):
+    _, decodes = clock
+
+    response = await client.patch(
+        "/api/auth/update-password", json={"password": "new"}, headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+    assert decodes == [token]
+
+
+@pytest.fixture
+def verified_hashes(monkeypatch):
+    hashes = []
+    real_verify = auth_router.verify_password_async
+
+    async def verify(plain_password, stored_password):
+        hashes.append(stored_password)
+        return await real_verify(plain_password, stored_password)
+
+    monkeypatch.setattr(auth_router, "verify_password_async", verify)
+    return hashes
+
+
+@pytest.mark.anyio
+async def test_login_upgrades_legacy_sha256_hash(client, users):
+    legacy_hash = hashlib.sha256(password.encode()).hexdigest()
+    users.users[email] = {"id": "user-123", "email": email, "password": legacy_hash, "name": "Juan"}
+
+    assert (await _login(client)).status_code == 200
+
+    [(user_id, update_data)] = users.update_calls
+    assert user_id == "user-123"
+    assert update_data["password"].startswith("$argon2")
+    assert verify_password(password, update_data["password"])
+    # Next login verifies the argon2 hash and leaves it alone
+    assert (await _login(client)).status_code == 200
+    assert len(users.update_calls) == 1
+
+
+@pytest.mark.anyio
+async def test_login_wrong_password_keeps_legacy_hash(client, users):
+    legacy_hash = hashlib.sha256(password.encode()).hexdigest()
+    users.users[email] = {"id": "user-123", "email": email, "password": legacy_hash, "name": "Juan"}
+
+    assert (await _login(client, login_password="wrong")).status_code == 400
+    assert users.update_calls == []
+
+
+@pytest.mark.anyio
+async def test_unknown_email_verifies_dummy_hash(client, users, verified_hashes):
+    # Every miss pays for one verify, including misses answered from _unknown_emails
+    for _ in range(auth_router.UNKNOWN_EMAIL_MISSES + 1):
+        response = await _login(client)
+        assert response.status_code == 400
+
+    assert verified_hashes == [DUMMY_PASSWORD_HASH] * (auth_router.UNKNOWN_EMAIL_MISSES + 1)
+
+
+# Run from the repository root: python -m tests.test_auth
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
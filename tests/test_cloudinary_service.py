@@ -0,0 +1,94 @@
+import sys
+from io import BytesIO
+
+import cloudinary.api_client.call_api
+import cloudinary.uploader
+import pytest
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
+
+import cloudinary_service
+from cloudinary_service import CloudinaryService
+
+
+_PAYLOAD = b"fakecontent"
+
+
+@pytest.fixture
+def sdk_http(monkeypatch):
+    # configure_cloudinary overwrites these private SDK attributes; fail loudly if an SDK
+    # upgrade renames them, and restore the originals after the test
+    for module in (cloudinary.uploader, cloudinary.api_client.call_api):
+        assert hasattr(module, "_http"), f"{module.__name__}._http no longer exists"
+        monkeypatch.setattr(module, "_http", module._http)
+    monkeypatch.setattr(cloudinary_service, "_configured", False)
+    return cloudinary.uploader._http, cloudinary.api_client.call_api._http
+
+
+def test_configure_cloudinary_replaces_sdk_pools(sdk_http):
+    cloudinary_service.configure_cloudinary()
+
+    http = cloudinary.uploader._http
+    assert cloudinary.api_client.call_api._http is http
+    assert http not in sdk_http
+    assert http.connection_pool_kw["maxsize"] == cloudinary_service.HTTP_POOL_MAXSIZE
+    assert http.connection_pool_kw["retries"].total == 3
+
+
+def test_configure_cloudinary_runs_once(sdk_http):
+    cloudinary_service.configure_cloudinary()
+    http = cloudinary.uploader._http
+
+    cloudinary_service.configure_cloudinary()
+
+    assert cloudinary.uploader._http is http
+
+
+@pytest.fixture
+def uploaded_chunks(monkeypatch):
+    # The real upload_large runs (including its `with` block); only the HTTP part is replaced
+    chunks = []
+
+    def upload_part(file_part, http_headers, options):
+        chunks.append(file_part[1])
+        return {
+            "public_id": options["public_id"],
+            "secure_url": "https://res.cloudinary.com/demo/image/upload/v1/vau_media/newid.jpg",
+            "resource_type": options["resource_type"],
+            "format": "jpg",
+            "bytes": len(file_part[1]),
+        }
+
+    monkeypatch.setattr(cloudinary.uploader, "_upload_large_part_with_auth_retry", upload_part)
+    return chunks
+
+
+def _upload_file(payload):
+    return UploadFile(file=BytesIO(payload), filename="newfile.jpg", headers=Headers({"content-type": "image/jpeg"}))
+
+
+@pytest.mark.anyio
+async def test_upload_file_leaves_upload_open(uploaded_chunks):
+    upload = _upload_file(_PAYLOAD)
+
+    result = await CloudinaryService.upload_file(file=upload, title="t")
+
+    assert uploaded_chunks == [_PAYLOAD]
+    assert result["resource_type"] == "image" and result["size"] == len(_PAYLOAD)
+    assert not upload.file.closed
+    await upload.seek(0)
+    assert await upload.read() == _PAYLOAD
+
+
+@pytest.mark.anyio
+async def test_upload_file_rejects_empty_file(uploaded_chunks):
+    with pytest.raises(HTTPException) as exc_info:
+        await CloudinaryService.upload_file(file=_upload_file(b""), title="t")
+
+    assert exc_info.value.status_code == 400
+    assert uploaded_chunks == []
+
+
+# Run from the repository root: python -m tests.test_cloudinary_service
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
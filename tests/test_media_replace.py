@@ -1,94 +1,223 @@
-import json
-import os
 import sys
 from io import BytesIO
-from unittest.mock import patch
+from types import MappingProxyType
 
-from fastapi.testclient import TestClient
+import httpx
+import pytest
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
 
-# Ensure project root is on sys.path
-PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
-if PROJECT_ROOT not in sys.path:
-    sys.path.insert(0, PROJECT_ROOT)
-
-from main import app
 from auth import create_access_token
 import routers.media as media_router
 
 
-def run():
-    client = TestClient(app)
-
-    # Token para usuario simulado
-    fake_user_id = "user-123"
-    token = create_access_token({"sub": fake_user_id})
-
-    # Datos simulados
-    media_id = "media-abc"  # ID interno en BD
-    bucket_id = "vau_media/oldid"  # public_id en Cloudinary
-    old_url = "https://res.cloudinary.com/demo/image/upload/v1234567890/vau_media/oldid.jpg"
-    fake_user_media = [
-        {
-            "id": media_id,
-            "user_id": fake_user_id,
-            "title": "Imagen antigua",
-            "description": "desc",
-            "size": 1000,
-            "type": "IMAGE",
-            "ext": "jpg",
-            "url": old_url,
-            "bucket_id": bucket_id,
-            "status": "active",
-            "project_id": None,
-            "createdAt": "2025-01-01T00:00:00Z",
-            "updatedAt": "2025-01-01T00:00:00Z",
-        }
-    ]
-
-    upload_result = {
-        "url": "https://res.cloudinary.com/demo/image/upload/v1234567891/vau_media/newid.jpg",
+# Token para usuario simulado
+fake_user_id = "user-123"
+token = create_access_token({"sub": fake_user_id})
+headers = {"Authorization": f"Bearer {token}"}
+
+# Datos simulados
+_PAYLOAD = b"fakecontent"  # httpx accepts raw bytes as a multipart file body
+media_id = "media-abc"  # ID interno en BD
+bucket_id = "vau_media/oldid"  # public_id en Cloudinary
+old_url = "https://res.cloudinary.com/demo/image/upload/v1234567890/vau_media/oldid.jpg"
+
+# Read-only and built once: shared by every test and parametrization
+fake_user_media = MappingProxyType({
+    "id": media_id,
+    "user_id": fake_user_id,
+    "title": "Imagen antigua",
+    "description": "desc",
+    "size": 1000,
+    "type": "IMAGE",
+    "ext": "jpg",
+    "url": old_url,
+    "bucket_id": bucket_id,
+    "status": "active",
+    "project_id": None,
+    "createdAt": "2025-01-01T00:00:00Z",
+    "updatedAt": "2025-01-01T00:00:00Z",
+})
+
+# Replace scenarios per stored media type: uploaded filename, content type, and the
+# Cloudinary resource type / format that go with it
+MEDIA_CASES = {
+    "IMAGE": ("newfile.jpg", "image/jpeg", "image", "jpg"),
+    "VIDEO": ("newfile.mp4", "video/mp4", "video", "mp4"),
+}
+
+
+def _upload_result(content_type, resource_type, ext):
+    return MappingProxyType({
+        "url": f"https://res.cloudinary.com/demo/{resource_type}/upload/v1234567891/vau_media/newid.{ext}",
         "public_id": "vau_media/newid",
-        "resource_type": "image",
-        "format": "jpg",
+        "resource_type": resource_type,
+        "format": ext,
         "size": 12345,
-        "contentType": "image/jpeg",
+        "contentType": content_type,
         "width": 100,
         "height": 100,
-    }
+    })
 
-    updated_db_record = {
+
+def _updated_record(media_type, upload):
+    return MappingProxyType({
         "id": media_id,
         "user_id": fake_user_id,
         "title": "Imagen antigua",
         "description": "desc",
-        "size": upload_result["size"],
-        "type": "IMAGE",
-        "ext": upload_result["format"],
-        "url": upload_result["url"],
-        "bucket_id": upload_result["public_id"],
+        "size": upload["size"],
+        "type": media_type,
+        "ext": upload["format"],
+        "url": upload["url"],
+        "bucket_id": upload["public_id"],
         "status": "active",
         "createdAt": "2025-01-01T00:00:00Z",
         "updatedAt": "2025-01-02T00:00:00Z",
-    }
+    })
+
+
+UPLOAD_RESULTS = {
+    media_type: _upload_result(content_type, resource_type, ext)
+    for media_type, (_, content_type, resource_type, ext) in MEDIA_CASES.items()
+}
+UPDATED_RECORDS = {media_type: _updated_record(media_type, UPLOAD_RESULTS[media_type]) for media_type in MEDIA_CASES}
+
+
+def _encode_multipart(filename, content_type):
+    # Encoded once: boundary, part headers and framing are reused by every request
+    request = httpx.Request("PATCH", "http://test", files={"file": (filename, _PAYLOAD, content_type)})
+    return request.read(), {**headers, "Content-Type": request.headers["Content-Type"]}
+
+
+MULTIPART_REQUESTS = {
+    media_type: _encode_multipart(filename, content_type)
+    for media_type, (filename, content_type, _, _) in MEDIA_CASES.items()
+}
+
+
+@pytest.fixture(params=sorted(MEDIA_CASES))
+def media_type(request):
+    return request.param
+
+
+class _FakeCloud:
+    """Stand-in for CloudinaryService: scripted results, recorded calls, no network"""
+
+    def __init__(self, upload_result):
+        self.upload_result = upload_result
+        self.delete_results = []  # consumed one per delete_file call; True once exhausted
+        self.upload_error = None
+        self.delete_calls = []
+        self.upload_calls = []
+
+    async def upload_file(self, **kwargs):
+        self.upload_calls.append(kwargs)
+        if self.upload_error:
+            raise self.upload_error
+        return self.upload_result
+
+    async def get_file_info(self, *args, **kwargs):
+        return {}
+
+    async def delete_file(self, public_id, resource_type="image"):
+        self.delete_calls.append((public_id, resource_type))
+        return self.delete_results.pop(0) if self.delete_results else True
+
+
+@pytest.fixture
+def cloud(media_type):
+    return _FakeCloud(UPLOAD_RESULTS[media_type])
+
+
+@pytest.fixture(autouse=True)
+def _mocks(monkeypatch, media_type, cloud):
+    # Plain async stubs set directly: no MagicMock spec checks or call recording
+    stored_media = {**fake_user_media, "type": media_type}
+
+    async def find_media_by_id(media_id, user_id):
+        return stored_media
+
+    async def update_media(media_id, update_data):
+        return UPDATED_RECORDS[media_type]
+
+    monkeypatch.setattr(media_router, "db_find_media_by_id", find_media_by_id)
+    monkeypatch.setattr(media_router, "CloudinaryService", cloud)
+    monkeypatch.setattr(media_router, "db_update_media", update_media)
+
+
+def _upload_file(media_type):
+    filename, content_type, _, _ = MEDIA_CASES[media_type]
+    return UploadFile(file=BytesIO(_PAYLOAD), filename=filename, headers=Headers({"content-type": content_type}))
+
+
+async def _replace(media_type):
+    # Handler logic only: no ASGI scope, routing, auth or multipart parsing
+    return await media_router.replace_media_file(
+        media_id, file=_upload_file(media_type), current_user={"user_id": fake_user_id}
+    )
+
+
+@pytest.mark.anyio
+async def test_media_replace(media_type, cloud):
+    resource_type = MEDIA_CASES[media_type][2]
+
+    result = await _replace(media_type)
+
+    assert result == {"message": "Media file replaced successfully", "data": UPDATED_RECORDS[media_type]}
+    assert [call["media_type"] for call in cloud.upload_calls] == [media_type]
+    assert cloud.delete_calls == [(bucket_id, resource_type)]
+
+
+@pytest.mark.anyio
+async def test_media_replace_raw_fallback(media_type, cloud):
+    # Typed delete misses (asset was stored as "raw"); the raw retry succeeds
+    cloud.delete_results = [False, True]
+    resource_type = MEDIA_CASES[media_type][2]
+
+    result = await _replace(media_type)
+
+    assert result["data"] == UPDATED_RECORDS[media_type]
+    assert cloud.delete_calls == [(bucket_id, resource_type), (bucket_id, "raw")]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("failure", ["old_delete_fails", "upload_fails"])
+async def test_media_replace_failure(media_type, cloud, failure):
+    resource_type = MEDIA_CASES[media_type][2]
+    if failure == "old_delete_fails":
+        # Typed and raw deletes both miss: the new asset is rolled back with its own resource type
+        cloud.delete_results = [False, False]
+        expected_deletes = [
+            (bucket_id, resource_type),
+            (bucket_id, "raw"),
+            (UPLOAD_RESULTS[media_type]["public_id"], resource_type),
+        ]
+    else:
+        # The concurrent old-asset delete is still awaited, not left running
+        cloud.upload_error = RuntimeError("cloudinary down")
+        expected_deletes = [(bucket_id, resource_type)]
+
+    with pytest.raises(HTTPException) as exc_info:
+        await _replace(media_type)
+
+    assert exc_info.value.status_code == 500
+    assert cloud.delete_calls == expected_deletes
 
-    with patch.object(media_router, "db_find_media", return_value=fake_user_media), \
-         patch.object(media_router.CloudinaryService, "upload_file", return_value=upload_result), \
-         patch.object(media_router.CloudinaryService, "get_file_info", return_value={}), \
-         patch.object(media_router.CloudinaryService, "delete_file", return_value=True), \
-         patch.object(media_router, "db_update_media", return_value=updated_db_record):
 
-        files = {"file": ("newfile.jpg", BytesIO(b"fakecontent"), "image/jpeg")}
-        headers = {"Authorization": f"Bearer {token}"}
+@pytest.mark.anyio
+async def test_media_replace_route(client, media_type, cloud):
+    body, request_headers = MULTIPART_REQUESTS[media_type]
 
-        # La ruta ahora usa id interno como identificador
-        response = client.patch(f"/api/media/item/{media_id}/replace", files=files, headers=headers)
+    # La ruta ahora usa id interno como identificador
+    response = await client.patch(f"/api/media/item/{media_id}/replace", content=body, headers=request_headers)
 
-        print("Status:", response.status_code)
-        try:
-            print("Body:", json.dumps(response.json(), indent=2, ensure_ascii=False))
-        except Exception:
-            print("Body (raw):", response.text)
+    assert response.status_code == 200, response.text
+    assert response.json() == {"message": "Media file replaced successfully", "data": dict(UPDATED_RECORDS[media_type])}
+    assert [call["media_type"] for call in cloud.upload_calls] == [media_type]
+    assert cloud.delete_calls == [(bucket_id, MEDIA_CASES[media_type][2])]
 
 
+# Run from the repository root: python -m tests.test_media_replace
 if __name__ == "__main__":
-    run()
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,124 @@
+import sys
+
+import pytest
+
+from auth import create_access_token
+import routers.nodes as nodes_router
+
+
+# Token para usuario simulado
+fake_user_id = "user-123"
+token = create_access_token({"sub": fake_user_id})
+headers = {"Authorization": f"Bearer {token}"}
+
+project_a = "project-a"
+project_b = "project-b"
+
+
+class _FakeDB:
+    """Stand-in for the batch's database calls: scripted results, recorded calls, no PostgreSQL"""
+
+    def __init__(self):
+        self.owned = {project_a, project_b}
+        self.batch_result = None  # (status, rows) returned by insert_nodes_batch; built from the input when None
+        self.owner_checks = []
+        self.batch_calls = []
+
+    async def user_owns_project(self, project_id, user_id):
+        self.owner_checks.append((project_id, user_id))
+        return project_id in self.owned
+
+    async def insert_nodes_batch(self, nodes_by_project):
+        self.batch_calls.append(nodes_by_project)
+        if self.batch_result is not None:
+            return self.batch_result
+        # Orders continue from 10 per project, like a project that already has nodes
+        return "ok", {
+            project_id: [(f"{project_id}-node-{order}", order) for order in range(11, 11 + len(nodes))]
+            for project_id, nodes in nodes_by_project.items()
+        }
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = _FakeDB()
+    monkeypatch.setattr(nodes_router, "user_owns_project", fake.user_owns_project)
+    monkeypatch.setattr(nodes_router, "insert_nodes_batch", fake.insert_nodes_batch)
+    return fake
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("size", [0, nodes_router.MAX_BATCH_NODES + 1])
+async def test_batch_size_limits(client, db, size):
+    response = await client.post("/api/node/batch", json=[{"projectId": project_a}] * size, headers=headers)
+
+    assert response.status_code == 400, response.text
+    assert db.owner_checks == [] and db.batch_calls == []
+
+
+@pytest.mark.anyio
+async def test_batch_interleaved_projects(client, db):
+    ops = [
+        {"projectId": project_a, "attributes": {"type": "video"}},
+        {"projectId": project_b},
+        {"projectId": project_a, "sourceNodeId": "source-a", "typeEdge": "step"},
+        {"projectId": project_b},
+        {"projectId": project_a},
+    ]
+
+    response = await client.post("/api/node/batch", json=ops, headers=headers)
+
+    assert response.status_code == 200, response.text
+    # Returned in request order even though the nodes are inserted grouped by project
+    assert response.json()["data"] == [
+        {"id": "project-a-node-11", "nodeOrder": 11, "projectId": project_a},
+        {"id": "project-b-node-11", "nodeOrder": 11, "projectId": project_b},
+        {"id": "project-a-node-12", "nodeOrder": 12, "projectId": project_a},
+        {"id": "project-b-node-12", "nodeOrder": 12, "projectId": project_b},
+        {"id": "project-a-node-13", "nodeOrder": 13, "projectId": project_a},
+    ]
+    # One ownership check per project, one insert for the whole batch
+    assert db.owner_checks == [(project_a, fake_user_id), (project_b, fake_user_id)]
+    [by_project] = db.batch_calls
+    assert [node["type"] for node in by_project[project_a]] == ["video", "default", "default"]
+    assert [(node["sourceNodeId"], node["typeEdge"]) for node in by_project[project_a]] == [
+        (None, "default"), ("source-a", "step"), (None, "default")
+    ]
+    assert len(by_project[project_b]) == 2
+
+
+@pytest.mark.anyio
+async def test_batch_not_owned_project(client, db):
+    db.owned = {project_a}
+
+    response = await client.post(
+        "/api/node/batch", json=[{"projectId": project_a}, {"projectId": project_b}], headers=headers
+    )
+
+    # Rejected before anything is written, including the owned project's nodes
+    assert response.status_code == 404, response.text
+    assert db.batch_calls == []
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("result, detail", [
+    ("missing_project", "Project not found"),
+    ("missing_source", "Source node not found"),
+])
+async def test_batch_rejected_in_transaction(client, db, result, detail):
+    # e.g. a project deleted on another worker after the cached ownership check
+    db.batch_result = (result, None)
+
+    response = await client.post(
+        "/api/node/batch", json=[{"projectId": project_a}, {"projectId": project_b, "sourceNodeId": "x"}],
+        headers=headers
+    )
+
+    assert response.status_code == 404, response.text
+    assert response.json() == {"detail": detail}
+    assert len(db.batch_calls) == 1
+
+
+# Run from the repository root: python -m tests.test_node_batch
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))